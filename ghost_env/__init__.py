@@ -5,6 +5,7 @@ __version__ = "0.1.0"
 from ghost_env.jwt_wrapper import wrap_value, unwrap_value
 from ghost_env.env_reader import read_env_file, wrap_env_file, write_ghost_env_file
 from ghost_env.config import get_config_path, ensure_signing_key
+from ghost_env.rules import WrapRules, compile_rules
 
 __all__ = [
     "__version__",
@@ -15,5 +16,7 @@ __all__ = [
     "write_ghost_env_file",
     "get_config_path",
     "ensure_signing_key",
+    "WrapRules",
+    "compile_rules",
 ]
 
@@ -0,0 +1,349 @@
+"""Resident ghost_env agent that holds the signing key behind a unix socket.
+
+Like ``ssh-agent``, the agent is started once per session. CLI commands
+find it via ``GHOST_ENV_AGENT_SOCK`` (or the default socket in the config
+directory) and delegate work to it instead of loading the key and PyJWT
+themselves. Only the owning user can connect: the socket is created with
+mode 0600 inside the user's config directory.
+
+The protocol is one JSON object per line in each direction. Requests carry
+an ``op`` field; responses carry ``ok`` plus either results or ``error``.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from ghost_env.config import get_config_dir, get_signing_key_path, ensure_signing_key
+from ghost_env.env_reader import wrap_env_file, write_ghost_env_file
+from ghost_env.jwt_wrapper import get_token_expiry, is_wrapped_token, unwrap_value
+from ghost_env.rules import WrapRules
+from ghost_env.token_cache import TokenCache
+
+AGENT_SOCKET_ENV = "GHOST_ENV_AGENT_SOCK"
+DISABLE_AGENT_ENV = "GHOST_ENV_NO_AGENT"
+
+
+class AgentError(Exception):
+    """Raised when the agent rejects a request or cannot be reached."""
+
+
+class AgentUnavailable(AgentError):
+    """Raised when a request could not be delivered, so the agent did nothing."""
+
+
+def get_agent_socket_path() -> Path:
+    """Get the agent socket path (GHOST_ENV_AGENT_SOCK or the config directory)."""
+    override = os.environ.get(AGENT_SOCKET_ENV)
+    if override:
+        return Path(override)
+    return get_config_dir() / "agent.sock"
+
+
+class AgentState:
+    """
+    Key and warm caches held by a running agent.
+
+    The signing key is re-read whenever the key file changes on disk, so a
+    ``ghost-env rotate`` takes effect without restarting the agent.
+    """
+
+    def __init__(self, unwrap_cache_size: int = 4096):
+        self.unwrap_cache_size = unwrap_cache_size
+        self._lock = threading.Lock()
+        self._key_stamp = None
+        self._signing_key = ""
+        self._rules: Dict[str, WrapRules] = {}
+        self._unwrapped: Dict[str, Any] = {}
+        self._cache: Optional[TokenCache] = None
+        # Token caches are not thread-safe: held across each wrap and save
+        self._cache_lock = threading.Lock()
+
+    @property
+    def signing_key(self) -> str:
+        """The current signing key, reloaded if the key file changed."""
+        key_path = get_signing_key_path()
+        try:
+            st = key_path.stat()
+            stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            stamp = None
+        with self._lock:
+            if stamp is None or stamp != self._key_stamp:
+                key = ensure_signing_key()
+                self._key_stamp = stamp
+                # A stat change alone (e.g. first creation) keeps warm caches
+                if key != self._signing_key:
+                    self._signing_key = key
+                    self._unwrapped.clear()
+                    self._cache = None
+            return self._signing_key
+
+    def token_cache(self, enabled: bool) -> Optional[TokenCache]:
+        """The persistent token cache for the current key, kept loaded between requests."""
+        signing_key = self.signing_key
+        if not enabled:
+            return None
+        with self._lock:
+            if self._cache is None or self._cache.signing_key != signing_key:
+                self._cache = TokenCache.open(signing_key)
+            return self._cache
+
+    def with_token_cache(self, enabled: bool, func: Callable[[Optional[TokenCache]], Any]) -> Any:
+        """Run func with the token cache (or None), serialized against other users of it."""
+        cache = self.token_cache(enabled)
+        if cache is None:
+            return func(None)
+        with self._cache_lock:
+            result = func(cache)
+            cache.save()
+        return result
+
+    def rules(self, spec: Optional[Dict[str, Any]]) -> Optional[WrapRules]:
+        """Return compiled rules for a serialized spec, compiling each spec once."""
+        if spec is None:
+            return None
+        cache_key = json.dumps(spec, sort_keys=True)
+        compiled = self._rules.get(cache_key)
+        if compiled is None:
+            compiled = WrapRules.from_dict(spec)
+            self._rules[cache_key] = compiled
+        return compiled
+
+    def unwrap(self, token: str) -> Optional[str]:
+        """Unwrap a token, reusing earlier verifications until the token expires."""
+        signing_key = self.signing_key
+        cached = self._unwrapped.get(token)
+        if cached is not None and cached[1] > time.time():
+            return cached[0]
+
+        value = unwrap_value(token, signing_key)
+        if value is not None:
+            exp = get_token_expiry(token)
+            with self._lock:
+                if len(self._unwrapped) >= self.unwrap_cache_size:
+                    self._unwrapped.clear()
+                self._unwrapped[token] = (value, exp if exp is not None else float("inf"))
+        return value
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute one request and build its response."""
+        op = request.get("op")
+
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid()}
+
+        if op == "wrap":
+            wrapped = self.with_token_cache(
+                request.get("cache", False),
+                lambda cache: wrap_env_file(
+                    request["values"],
+                    self.signing_key,
+                    self.rules(request.get("rules")),
+                    request.get("expires_in_days", 365),
+                    cache,
+                    request.get("compress", False),
+                ),
+            )
+            return {"ok": True, "values": wrapped}
+
+        if op == "unwrap":
+            values = [
+                self.unwrap(token) if is_wrapped_token(token) else None
+                for token in request["tokens"]
+            ]
+            return {"ok": True, "values": values}
+
+        if op == "convert":
+            count = self.with_token_cache(
+                request.get("cache", False),
+                lambda cache: write_ghost_env_file(
+                    request["input"],
+                    request["output"],
+                    self.signing_key,
+                    self.rules(request.get("rules")),
+                    cache,
+                    request.get("profile"),
+                    request.get("compress", False),
+                ),
+            )
+            return {"ok": True, "count": count}
+
+        return {"ok": False, "error": f"Unknown operation: {op}"}
+
+
+class _AgentRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = self.server.state.handle(json.loads(line.decode("utf-8")))
+            except FileNotFoundError as e:
+                response = {"ok": False, "error": str(e), "type": "FileNotFoundError"}
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+
+    class AgentServer(socketserver.ThreadingUnixStreamServer):
+        """Threaded unix socket server bound with owner-only permissions."""
+
+        daemon_threads = True
+
+        def __init__(self, socket_path: Path, state: Optional[AgentState] = None):
+            self.socket_path = Path(socket_path)
+            self.state = state or AgentState()
+            _remove_stale_socket(self.socket_path)
+            # Never let the socket exist with group/other access, even briefly
+            old_umask = os.umask(0o177)
+            try:
+                super().__init__(str(self.socket_path), _AgentRequestHandler)
+            finally:
+                os.umask(old_umask)
+            os.chmod(self.socket_path, 0o600)
+
+        def server_close(self):
+            super().server_close()
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+
+
+def _remove_stale_socket(socket_path: Path) -> None:
+    """Remove a socket left behind by a dead agent; refuse to replace a live one."""
+    if not socket_path.exists():
+        return
+    if connect_agent(socket_path) is not None:
+        raise AgentError(f"An agent is already listening on {socket_path}")
+    socket_path.unlink()
+
+
+class AgentClient:
+    """Connection to a running agent."""
+
+    def __init__(self, sock: socket.socket):
+        self._sock = sock
+        self._reader = sock.makefile("rb")
+
+    def close(self) -> None:
+        """Close the connection."""
+        self._reader.close()
+        self._sock.close()
+
+    def request(self, op: str, **params: Any) -> Dict[str, Any]:
+        """
+        Send one request and wait for its response.
+
+        Raises:
+            AgentUnavailable: If the request could not be sent
+            AgentError: If the agent reports an error, or the connection
+                drops or times out after the request was sent (the agent
+                may still be acting on it)
+        """
+        params["op"] = op
+        try:
+            self._sock.sendall(json.dumps(params).encode("utf-8") + b"\n")
+        except OSError as e:
+            raise AgentUnavailable(f"Agent connection failed: {e}")
+        try:
+            line = self._reader.readline()
+        except OSError as e:
+            raise AgentError(f"No response from agent: {e}")
+        if not line:
+            raise AgentError("Agent closed the connection")
+
+        response = json.loads(line.decode("utf-8"))
+        if not response.get("ok"):
+            if response.get("type") == "FileNotFoundError":
+                raise FileNotFoundError(response.get("error"))
+            raise AgentError(response.get("error", "Agent request failed"))
+        return response
+
+    def wrap(
+        self,
+        env_vars: Dict[str, str],
+        rules: Optional[WrapRules] = None,
+        expires_in_days: int = 365,
+        use_cache: bool = False,
+        compress: bool = False,
+    ) -> Dict[str, str]:
+        """Agent-side :func:`ghost_env.env_reader.wrap_env_file`."""
+        return self.request(
+            "wrap",
+            values=env_vars,
+            rules=rules.to_dict() if rules is not None else None,
+            expires_in_days=expires_in_days,
+            cache=use_cache,
+            compress=compress,
+        )["values"]
+
+    def unwrap(self, tokens: List[str]) -> List[Optional[str]]:
+        """Unwrap tokens in one round trip (None for non-token, invalid or expired input)."""
+        return self.request("unwrap", tokens=tokens)["values"]
+
+    def convert(
+        self,
+        env_path: str,
+        output_path: str,
+        rules: Optional[WrapRules] = None,
+        use_cache: bool = False,
+        profile: Optional[str] = None,
+        compress: bool = False,
+    ) -> int:
+        """
+        Agent-side :func:`ghost_env.env_reader.write_ghost_env_file` for real paths.
+
+        Waits without a timeout: the agent keeps writing ``output_path``
+        until it is done, so giving up early would invite a second writer.
+        """
+        timeout = self._sock.gettimeout()
+        self._sock.settimeout(None)
+        try:
+            return self.request(
+                "convert",
+                input=os.path.abspath(env_path),
+                output=os.path.abspath(output_path),
+                rules=rules.to_dict() if rules is not None else None,
+                cache=use_cache,
+                profile=profile,
+                compress=compress,
+            )["count"]
+        finally:
+            self._sock.settimeout(timeout)
+
+
+def connect_agent(socket_path: Optional[Path] = None, timeout: float = 30.0) -> Optional[AgentClient]:
+    """
+    Connect to a running agent if there is one.
+
+    Args:
+        socket_path: Socket to connect to (default: :func:`get_agent_socket_path`)
+        timeout: Socket timeout in seconds for each request
+
+    Returns:
+        A connected client, or None if no agent is reachable or agents are
+        disabled with GHOST_ENV_NO_AGENT
+    """
+    if not hasattr(socket, "AF_UNIX") or os.environ.get(DISABLE_AGENT_ENV):
+        return None
+    if socket_path is None:
+        socket_path = get_agent_socket_path()
+    if not Path(socket_path).exists():
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(socket_path))
+    except OSError:
+        sock.close()
+        return None
+    return AgentClient(sock)
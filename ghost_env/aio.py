@@ -0,0 +1,176 @@
+"""asyncio counterparts of the env_reader API.
+
+File I/O and signing/verification run on an executor so the event loop
+keeps serving other startup work. Variables are processed in chunks, and
+at most ``max_concurrency`` chunks run at once, so one large .env file
+cannot take over a shared executor.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ghost_env import env_reader
+from ghost_env.rules import WrapRules
+
+DEFAULT_CHUNK_SIZE = 64
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+async def _run(executor: Optional[Executor], func: Callable[..., Any], *args: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args))
+
+
+def _chunks(env_vars: Dict[str, str], chunk_size: int) -> List[Dict[str, str]]:
+    items: List[Tuple[str, str]] = list(env_vars.items())
+    return [dict(items[i:i + chunk_size]) for i in range(0, len(items), chunk_size)]
+
+
+async def _map_chunks(
+    func: Callable[[Dict[str, str]], Dict[str, str]],
+    env_vars: Dict[str, str],
+    chunk_size: int,
+    max_concurrency: int,
+    executor: Optional[Executor],
+) -> Dict[str, str]:
+    if chunk_size < 1 or max_concurrency < 1:
+        raise ValueError("chunk_size and max_concurrency must be positive")
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_chunk(chunk: Dict[str, str]) -> Dict[str, str]:
+        async with semaphore:
+            return await _run(executor, func, chunk)
+
+    results = await asyncio.gather(*(run_chunk(c) for c in _chunks(env_vars, chunk_size)))
+
+    merged: Dict[str, str] = {}
+    for result in results:
+        merged.update(result)
+    return merged
+
+
+async def read_env_file(
+    env_path: Optional[str] = None,
+    executor: Optional[Executor] = None,
+    profile: Optional[str] = None,
+) -> Dict[str, str]:
+    """
+    Read a .env file without blocking the event loop.
+
+    Args:
+        env_path: Path to the .env file. If None, searches for .env in current directory.
+        executor: Executor to run on (default: the loop's default executor)
+        profile: Optional profile name to layer overrides on top of env_path
+
+    Returns:
+        Dictionary of environment variable key-value pairs
+    """
+    return await _run(executor, env_reader.read_env_file, env_path, profile)
+
+
+async def wrap_env_file(
+    env_vars: Dict[str, str],
+    signing_key: str,
+    rules: Optional[WrapRules] = None,
+    expires_in_days: int = 365,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    executor: Optional[Executor] = None,
+    compress: bool = False,
+) -> Dict[str, str]:
+    """
+    Wrap environment variable values in JWT tokens on an executor.
+
+    Args:
+        env_vars: Dictionary of environment variable key-value pairs
+        signing_key: The secret key used to sign the JWTs
+        rules: Optional wrapping rules; values they reject pass through as
+            plaintext. If None, every value is wrapped.
+        expires_in_days: Token expiration time in days (default: 365)
+        chunk_size: Variables signed per executor job
+        max_concurrency: Maximum executor jobs in flight
+        executor: Executor to run on (default: the loop's default executor)
+        compress: Store large values compressed
+
+    Returns:
+        Dictionary with wrapped values, in the original key order
+    """
+    func = functools.partial(
+        _wrap_chunk,
+        signing_key=signing_key,
+        rules=rules,
+        expires_in_days=expires_in_days,
+        compress=compress,
+    )
+    return await _map_chunks(func, env_vars, chunk_size, max_concurrency, executor)
+
+
+def _wrap_chunk(
+    chunk: Dict[str, str],
+    signing_key: str,
+    rules: Optional[WrapRules],
+    expires_in_days: int,
+    compress: bool,
+) -> Dict[str, str]:
+    return env_reader.wrap_env_file(
+        chunk, signing_key, rules, expires_in_days, compress=compress
+    )
+
+
+async def unwrap_env_vars(
+    env_vars: Dict[str, str],
+    signing_key: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    executor: Optional[Executor] = None,
+) -> Dict[str, str]:
+    """
+    Unwrap JWT tokens in environment variables on an executor.
+
+    Args:
+        env_vars: Dictionary of environment variable key-value pairs (may contain tokens)
+        signing_key: The secret key used to verify the JWTs
+        chunk_size: Variables verified per executor job
+        max_concurrency: Maximum executor jobs in flight
+        executor: Executor to run on (default: the loop's default executor)
+
+    Returns:
+        Dictionary with unwrapped values, in the original key order
+    """
+    func = functools.partial(env_reader.unwrap_env_vars, signing_key=signing_key)
+    return await _map_chunks(func, env_vars, chunk_size, max_concurrency, executor)
+
+
+async def write_ghost_env_file(
+    env_path: str,
+    output_path: str,
+    signing_key: str,
+    rules: Optional[WrapRules] = None,
+    executor: Optional[Executor] = None,
+) -> int:
+    """
+    Convert a .env file to a ghost.env file without blocking the event loop.
+
+    The conversion streams line by line in a single executor job, so the
+    output keeps the input's order and formatting.
+
+    Args:
+        env_path: Path to the input .env file
+        output_path: Path to the output ghost.env file
+        signing_key: The secret key used to sign the JWTs
+        rules: Optional wrapping rules; lines whose values they reject are
+            copied through unchanged and not counted
+        executor: Executor to run on (default: the loop's default executor)
+
+    Returns:
+        Number of variables wrapped
+
+    Raises:
+        FileNotFoundError: If the input file does not exist
+    """
+    return await _run(
+        executor, env_reader.write_ghost_env_file, env_path, output_path, signing_key, rules
+    )
@@ -0,0 +1,272 @@
+"""Load-testing harness for the bridge server.
+
+Starts ``ghost-env serve`` in a subprocess against a synthetic .env file and
+a throwaway signing key, then drives it with concurrent keep-alive clients.
+The server runs out of process so client threads do not compete with it
+for the GIL.
+"""
+
+import http.client
+import json
+import os
+import random
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+ENDPOINTS = ("env", "unwrap", "health")
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """
+    Parse a request mix such as ``env=8,unwrap=1,health=1``.
+
+    Raises:
+        ValueError: If an endpoint is unknown or no weight is positive
+    """
+    weights = {}
+    for part in mix.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint in mix: {name} (expected one of {', '.join(ENDPOINTS)})")
+        weights[name] = float(weight) if weight else 1.0
+    if not any(weight > 0 for weight in weights.values()):
+        raise ValueError("Request mix needs at least one positive weight")
+    return weights
+
+
+def write_synthetic_env(path: Path, variables: int, value_size: int) -> None:
+    """Write a .env file with a mix of secret-looking and plain values."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Synthetic environment for ghost-env bench-serve\n")
+        for i in range(variables):
+            if i % 4 == 3:
+                f.write(f"SETTING_{i}={i}\n")
+            else:
+                value = secrets.token_urlsafe(value_size)[:value_size]
+                f.write(f"SECRET_{i}={value}\n")
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted sequence (None if empty)."""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_healthy(port: int, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited early with status {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("Server did not become healthy in time")
+
+
+class _Worker(threading.Thread):
+    """One keep-alive client issuing requests until the deadline."""
+
+    def __init__(
+        self,
+        port: int,
+        mix: Dict[str, float],
+        unwrap_body: bytes,
+        deadline: float,
+        max_requests: Optional[int],
+        seed: int,
+    ):
+        super().__init__(daemon=True)
+        self.port = port
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.unwrap_body = unwrap_body
+        self.deadline = deadline
+        self.max_requests = max_requests
+        self.random = random.Random(seed)
+        self.samples: List[Tuple[str, float, bool]] = []
+
+    def run(self) -> None:
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+        try:
+            while time.time() < self.deadline:
+                if self.max_requests is not None and len(self.samples) >= self.max_requests:
+                    break
+                name = self.random.choices(self.names, self.weights)[0]
+                start = time.perf_counter()
+                ok = self._request(conn, name)
+                self.samples.append((name, time.perf_counter() - start, ok))
+                if not ok:
+                    # Start over on a fresh connection after any failure
+                    conn.close()
+        finally:
+            conn.close()
+
+    def _request(self, conn: http.client.HTTPConnection, name: str) -> bool:
+        try:
+            if name == "env":
+                conn.request("GET", "/env.json")
+            elif name == "health":
+                conn.request("GET", "/health")
+            else:
+                conn.request(
+                    "POST",
+                    "/unwrap",
+                    body=self.unwrap_body,
+                    headers={"Content-Type": "application/json"},
+                )
+            response = conn.getresponse()
+            body = response.read()
+            if response.status != 200:
+                return False
+            return name != "unwrap" or b'"value"' in body
+        except (OSError, http.client.HTTPException):
+            return False
+
+
+def _summarize(samples: List[Tuple[str, float, bool]], elapsed: float) -> Dict[str, Any]:
+    latencies = sorted(latency for _, latency, _ in samples)
+    errors = sum(1 for _, _, ok in samples if not ok)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "throughput_rps": len(samples) / elapsed if elapsed > 0 else 0.0,
+        "latency_ms": {
+            name: (round(value * 1000, 3) if value is not None else None)
+            for name, value in (
+                ("p50", percentile(latencies, 50)),
+                ("p95", percentile(latencies, 95)),
+                ("p99", percentile(latencies, 99)),
+                ("max", latencies[-1] if latencies else None),
+            )
+        },
+    }
+
+
+def run_bench(
+    clients: int = 8,
+    duration: float = 10.0,
+    mix: str = "env=8,unwrap=1,health=1",
+    variables: int = 100,
+    value_size: int = 32,
+    threaded: bool = False,
+    requests_per_client: Optional[int] = None,
+    serve_args: Sequence[str] = (),
+    startup_timeout: float = 30.0,
+) -> Dict[str, Any]:
+    """
+    Benchmark the bridge server and return the results.
+
+    Args:
+        clients: Number of concurrent keep-alive clients
+        duration: Seconds to drive load for
+        mix: Weighted request mix over the env, unwrap and health endpoints
+        variables: Number of variables in the synthetic .env file
+        value_size: Length of each synthetic secret value
+        threaded: Start the server with ``--threaded``
+        requests_per_client: Optional cap on requests per client
+        serve_args: Extra arguments passed to ``ghost-env serve``
+        startup_timeout: Seconds to wait for the server to become healthy
+
+    Returns:
+        A JSON-serializable dict with the configuration, server startup
+        time, and overall plus per-endpoint throughput, latency percentiles
+        and error rates
+    """
+    weights = parse_mix(mix)
+
+    with tempfile.TemporaryDirectory(prefix="ghost-env-bench-") as tmpdir:
+        env_path = Path(tmpdir) / ".env"
+        write_synthetic_env(env_path, variables, value_size)
+
+        port = _free_port()
+        command = [
+            sys.executable, "-m", "ghost_env.cli", "--no-agent", "serve",
+            "--port", str(port), "--env-file", str(env_path),
+        ]
+        if threaded:
+            command.append("--threaded")
+        command.extend(serve_args)
+
+        # Throwaway config directory so the user's signing key is untouched,
+        # and this copy of ghost_env importable even if it is not installed
+        package_root = str(Path(__file__).resolve().parent.parent)
+        python_path = os.pathsep.join(filter(None, [package_root, os.environ.get("PYTHONPATH")]))
+        env = dict(os.environ, XDG_CONFIG_HOME=tmpdir, APPDATA=tmpdir, PYTHONPATH=python_path)
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            _wait_until_healthy(port, process, startup_timeout)
+            startup_seconds = time.perf_counter() - started
+
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            conn.request("GET", "/env.json")
+            wrapped = json.loads(conn.getresponse().read())
+            conn.close()
+            token = next((v for v in wrapped.values() if v.startswith("gho_env.")), "")
+            unwrap_body = json.dumps({"token": token}).encode("utf-8")
+
+            begin = time.perf_counter()
+            deadline = time.time() + duration
+            workers = [
+                _Worker(port, weights, unwrap_body, deadline, requests_per_client, seed)
+                for seed in range(clients)
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - begin
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+    samples = [sample for worker in workers for sample in worker.samples]
+    return {
+        "config": {
+            "clients": clients,
+            "duration": duration,
+            "mix": weights,
+            "variables": variables,
+            "value_size": value_size,
+            "server_mode": "threaded" if threaded else "single",
+            "serve_args": list(serve_args),
+        },
+        "startup_seconds": round(startup_seconds, 4),
+        "elapsed_seconds": round(elapsed, 4),
+        "overall": _summarize(samples, elapsed),
+        "endpoints": {
+            name: _summarize([s for s in samples if s[0] == name], elapsed)
+            for name in weights
+        },
+    }
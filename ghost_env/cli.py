@@ -1,14 +1,147 @@
 """Command-line interface for ghost_env."""
 
 import argparse
+import itertools
 import json
+import os
+import shlex
+import signal
 import sys
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Iterator, List, Optional, TextIO, Tuple, TypeVar
 
 from ghost_env.config import ensure_signing_key, rotate_signing_key, get_config_path
-from ghost_env.env_reader import read_env_file, wrap_env_file, unwrap_env_vars, write_ghost_env_file
+from ghost_env.env_reader import (
+    format_env_line,
+    parse_env_line,
+    read_env_file,
+    wrap_env_file,
+    unwrap_env_vars,
+    write_ghost_env_file,
+)
 from ghost_env.jwt_wrapper import is_wrapped_token, unwrap_value
+from ghost_env.rules import WrapRules, compile_rules
+from ghost_env.token_cache import TokenCache
+
+T = TypeVar("T")
+
+# Tokens resolved per agent round trip in batch unwrap mode
+UNWRAP_CHUNK_SIZE = 256
+
+
+def _rules_from_args(args: argparse.Namespace) -> Optional[WrapRules]:
+    """Compile the selective wrapping options of a subcommand (None wraps everything)."""
+    return compile_rules(
+        wrap_keys=args.wrap_key,
+        plain_keys=args.plain_key,
+        heuristics=args.selective,
+    )
+
+
+def _add_rule_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the selective wrapping options shared by wrap, convert and serve."""
+    parser.add_argument(
+        "--wrap-key",
+        action="append",
+        metavar="PATTERN",
+        help="Always wrap keys matching this glob (or 're:' regex); repeatable",
+    )
+    parser.add_argument(
+        "--plain-key",
+        action="append",
+        metavar="PATTERN",
+        help="Never wrap keys matching this glob (or 're:' regex); repeatable",
+    )
+    parser.add_argument(
+        "--selective",
+        action="store_true",
+        help="Only wrap values that look secret (key hints, known prefixes, entropy)",
+    )
+
+
+def _token_cache(args: argparse.Namespace, signing_key: str) -> Optional[TokenCache]:
+    """Open the persistent token cache unless --no-cache was given."""
+    if args.no_cache:
+        return None
+    return TokenCache.open(signing_key)
+
+
+def _add_cache_argument(parser: argparse.ArgumentParser) -> None:
+    """Add the --no-cache option shared by wrap, convert and serve."""
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Sign every value afresh instead of reusing cached tokens"
+    )
+
+
+def _add_compress_argument(parser: argparse.ArgumentParser) -> None:
+    """Add the --compress option shared by wrap, convert and serve."""
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="Store large values (1 KiB+) zlib-compressed; needs a ghost_env that reads compressed tokens"
+    )
+
+
+def _add_profile_argument(parser: argparse.ArgumentParser) -> None:
+    """Add the --env-profile option shared by wrap, convert and serve."""
+    parser.add_argument(
+        "--env-profile",
+        metavar="NAME",
+        help="Layer .env.local, .env.NAME and .env.NAME.local over the .env file"
+    )
+
+
+class DelegationError(Exception):
+    """Raised when the agent failed after receiving a request."""
+
+
+def _delegate(args: argparse.Namespace, operation: Callable[[Any], T]) -> Optional[T]:
+    """
+    Run an operation against the resident agent.
+    
+    Returns None when no agent is running or the request could not be
+    delivered, in which case the caller does the work in-process.
+    
+    Raises:
+        DelegationError: If the agent failed after receiving the request.
+            Redoing the work here could race with the agent, e.g. two
+            writers on one output file, so there is no fallback.
+    """
+    if args.no_agent:
+        return None
+    
+    from ghost_env.agent import AgentError, AgentUnavailable, connect_agent
+    
+    agent = connect_agent()
+    if agent is None:
+        return None
+    try:
+        return operation(agent)
+    except AgentUnavailable:
+        return None
+    except AgentError as e:
+        raise DelegationError(f"ghost-env agent request failed: {e}")
+    finally:
+        agent.close()
+
+
+def _token_resolver(args: argparse.Namespace) -> Callable[[List[str]], List[Optional[str]]]:
+    """Return a batch unwrapper backed by the agent, or by a single local key load."""
+    signing_key = None
+    
+    def resolve(tokens: List[str]) -> List[Optional[str]]:
+        nonlocal signing_key
+        if signing_key is None:
+            values = _delegate(args, lambda agent: agent.unwrap(tokens))
+            if values is not None:
+                return values
+            signing_key = ensure_signing_key()
+        return [unwrap_value(token, signing_key) for token in tokens]
+    
+    return resolve
 
 
 def cmd_init(args: argparse.Namespace) -> int:
@@ -26,89 +159,65 @@ def cmd_init(args: argparse.Namespace) -> int:
 
 def cmd_serve(args: argparse.Namespace) -> int:
     """Serve wrapped environment variables via HTTP server."""
-    try:
-        from http.server import HTTPServer, BaseHTTPRequestHandler
-        import urllib.parse
-    except ImportError:
-        print("Error: HTTP server functionality requires Python standard library", file=sys.stderr)
-        return 1
+    from ghost_env.server import (
+        EnvFileWatcher,
+        EnvServerState,
+        SnapshotRefresher,
+        SnapshotWarmer,
+        create_server,
+    )
     
     # Ensure signing key exists
     signing_key = ensure_signing_key()
     
     # Read .env file
     env_path = args.env_file or ".env"
-    env_vars = read_env_file(env_path)
+    try:
+        env_vars = read_env_file(env_path, args.env_profile)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
     
     if not env_vars:
         print(f"Warning: No environment variables found in {env_path}", file=sys.stderr)
     
-    # Wrap all values
-    wrapped_vars = wrap_env_file(env_vars, signing_key)
-    
-    verbose = args.verbose
-    
-    class EnvHandler(BaseHTTPRequestHandler):
-        def do_GET(self):
-            """Handle GET requests for environment variables."""
-            if self.path == "/env" or self.path == "/env.json":
-                self.send_response(200)
-                self.send_header("Content-Type", "application/json")
-                self.send_header("Access-Control-Allow-Origin", "*")
-                self.end_headers()
-                self.wfile.write(json.dumps(wrapped_vars).encode("utf-8"))
-            elif self.path == "/health":
-                self.send_response(200)
-                self.send_header("Content-Type", "text/plain")
-                self.end_headers()
-                self.wfile.write(b"OK")
-            else:
-                self.send_response(404)
-                self.end_headers()
-        
-        def do_POST(self):
-            """Handle POST requests to unwrap tokens."""
-            if self.path == "/unwrap":
-                content_length = int(self.headers.get("Content-Length", 0))
-                body = self.rfile.read(content_length)
-                
-                try:
-                    data = json.loads(body.decode("utf-8"))
-                    token = data.get("token", "")
-                    
-                    if is_wrapped_token(token):
-                        value = unwrap_value(token, signing_key)
-                        if value is not None:
-                            response = {"value": value}
-                        else:
-                            response = {"error": "Invalid or expired token"}
-                    else:
-                        response = {"error": "Not a wrapped token"}
-                    
-                    self.send_response(200)
-                    self.send_header("Content-Type", "application/json")
-                    self.end_headers()
-                    self.wfile.write(json.dumps(response).encode("utf-8"))
-                except Exception as e:
-                    self.send_response(400)
-                    self.send_header("Content-Type", "application/json")
-                    self.end_headers()
-                    self.wfile.write(json.dumps({"error": str(e)}).encode("utf-8"))
-            else:
-                self.send_response(404)
-                self.end_headers()
-        
-        def log_message(self, format, *args):
-            """Suppress default logging."""
-            if verbose:
-                super().log_message(format, *args)
+    # Wrap secret values; plaintext-safe ones pass through untouched.
+    # In lazy mode, keys are wrapped on first request and warmed in the background
+    state = EnvServerState(
+        env_vars,
+        signing_key,
+        rules=_rules_from_args(args),
+        expires_in_days=args.expires_in_days,
+        refresh_margin=args.refresh_margin,
+        cache=_token_cache(args, signing_key),
+        lazy=args.lazy,
+        compress=args.compress,
+    )
+    warmer = None
+    if args.lazy:
+        warmer = SnapshotWarmer(state)
+        warmer.start()
+    
+    # Re-wrap tokens in the background before they expire
+    refresher = SnapshotRefresher(state)
+    refresher.start()
+    
+    # Publish .env edits as new versions for /env.json?since= and /events
+    watcher = None
+    if args.watch > 0:
+        watcher = EnvFileWatcher(state, env_path, interval=args.watch, profile=args.env_profile)
+        watcher.start()
     
     port = args.port
-    server_address = ("", port)
-    httpd = HTTPServer(server_address, EnvHandler)
+    httpd = create_server(state, port, verbose=args.verbose, threaded=args.threaded)
     
     print(f"ghost_env server running on http://localhost:{port}")
     print(f"  GET  /env.json - Get all wrapped environment variables")
+    print(f"  GET  /env.json?since=<version> - Get keys changed since a version")
+    print(f"  GET  /env.json?keys=A,B - Get only the listed keys")
+    print(f"  GET  /env/<KEY> - Get a single wrapped key")
+    if args.threaded:
+        print(f"  GET  /events   - Stream changes as Server-Sent Events")
     print(f"  POST /unwrap   - Unwrap a JWT token")
     print(f"  GET  /health   - Health check")
     print("\nPress Ctrl+C to stop")
@@ -117,7 +226,13 @@ def cmd_serve(args: argparse.Namespace) -> int:
         httpd.serve_forever()
     except KeyboardInterrupt:
         print("\nShutting down server...")
-        httpd.shutdown()
+        refresher.stop()
+        if warmer is not None:
+            warmer.stop()
+        if watcher is not None:
+            watcher.stop()
+        state.close()
+        httpd.server_close()
         return 0
 
 
@@ -134,55 +249,188 @@ def cmd_rotate(args: argparse.Namespace) -> int:
 
 def cmd_wrap(args: argparse.Namespace) -> int:
     """Wrap environment variables from a .env file and output them."""
-    signing_key = ensure_signing_key()
-    env_vars = read_env_file(args.env_file)
+    from ghost_env.exporters import export_wrapped, parse_target
+    
+    # Validate every target before doing any signing
+    try:
+        targets = [parse_target(spec) for spec in args.output or []]
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if not targets:
+        targets = [(args.format, "-")]
+    
+    try:
+        env_vars = read_env_file(args.env_file, args.env_profile)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
     
     if not env_vars:
         print(f"No environment variables found in {args.env_file}", file=sys.stderr)
         return 1
     
-    wrapped_vars = wrap_env_file(env_vars, signing_key)
+    rules = _rules_from_args(args)
+    wrapped_vars = _delegate(
+        args,
+        lambda agent: agent.wrap(
+            env_vars, rules, use_cache=not args.no_cache, compress=args.compress
+        ),
+    )
+    if wrapped_vars is None:
+        signing_key = ensure_signing_key()
+        cache = _token_cache(args, signing_key)
+        wrapped_vars = wrap_env_file(
+            env_vars, signing_key, rules, cache=cache, compress=args.compress
+        )
+        if cache is not None:
+            cache.save()
     
-    if args.format == "json":
-        print(json.dumps(wrapped_vars, indent=2))
-    elif args.format == "env":
-        for key, value in wrapped_vars.items():
-            print(f"{key}={value}")
-    else:
-        print("Unknown format", file=sys.stderr)
+    # One wrap pass feeds every target, so they all carry identical tokens
+    try:
+        export_wrapped(wrapped_vars, targets, secret_name=args.secret_name)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
         return 1
     
+    for fmt, path in targets:
+        if path != "-":
+            print(f"✓ Wrote {fmt} output to: {path}", file=sys.stderr)
+    
     return 0
 
 
+def _iter_token_lines(stream: TextIO) -> Iterator[Tuple[Optional[str], str]]:
+    """Yield (key, value) for KEY=token lines and (None, token) for bare tokens."""
+    for line in stream:
+        parsed = parse_env_line(line)
+        if parsed is not None:
+            key, value, _ = parsed
+            yield key, value
+        else:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield None, line
+
+
+def _format_unwrapped(key: Optional[str], value: str, fmt: str) -> str:
+    """Render one unwrapped variable for the raw, dotenv or export formats."""
+    if key is None:
+        return value
+    if fmt == "export":
+        return f"export {key}={shlex.quote(value)}"
+    if fmt == "dotenv":
+        return format_env_line(key, value)
+    return f"{key}={value}"
+
+
 def cmd_unwrap(args: argparse.Namespace) -> int:
-    """Unwrap a JWT token."""
-    signing_key = ensure_signing_key()
+    """Unwrap a JWT token, or every token in a file or stdin."""
+    resolve = _token_resolver(args)
     
-    if args.token:
-        value = unwrap_value(args.token, signing_key)
-        if value is not None:
-            print(value)
-            return 0
+    if args.file is None and not args.stdin:
+        if args.token:
+            value = resolve([args.token])[0]
+            if value is not None:
+                print(value)
+                return 0
+            else:
+                print("Error: Invalid or expired token", file=sys.stderr)
+                return 1
         else:
-            print("Error: Invalid or expired token", file=sys.stderr)
+            print("Error: No token provided", file=sys.stderr)
+            return 1
+    
+    if args.file is not None:
+        try:
+            stream = open(args.file, "r", encoding="utf-8")
+        except OSError as e:
+            print(f"Error: {e}", file=sys.stderr)
             return 1
     else:
-        print("Error: No token provided", file=sys.stderr)
-        return 1
+        stream = sys.stdin
+    
+    resolved = {}
+    failures = 0
+    lines = _iter_token_lines(stream)
+    
+    try:
+        while True:
+            # Resolve in chunks: one agent round trip (or key load) per chunk
+            chunk = list(itertools.islice(lines, UNWRAP_CHUNK_SIZE))
+            if not chunk:
+                break
+            tokens = [value for _, value in chunk if is_wrapped_token(value)]
+            unwrapped = iter(resolve(tokens) if tokens else [])
+            
+            for key, value in chunk:
+                if is_wrapped_token(value):
+                    plain = next(unwrapped)
+                    if plain is None:
+                        label = key or value[:20] + "..."
+                        print(f"Error: Invalid or expired token for {label}", file=sys.stderr)
+                        failures += 1
+                        continue
+                    value = plain
+                
+                if args.format == "json":
+                    if key is None:
+                        print("Error: JSON output requires KEY=token lines", file=sys.stderr)
+                        return 1
+                    resolved[key] = value
+                else:
+                    print(_format_unwrapped(key, value, args.format))
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    
+    if args.format == "json":
+        print(json.dumps(resolved, indent=2))
+    
+    return 1 if failures else 0
 
 
 def cmd_convert(args: argparse.Namespace) -> int:
     """Convert a .env file to a ghost.env file with wrapped values."""
-    signing_key = ensure_signing_key()
+    input_file = args.input or args.source or ".env"
+    output_file = args.output or args.destination or "ghost.env"
+    
+    # Keep stdout clean when it carries the converted stream
+    status = sys.stderr if output_file == "-" else sys.stdout
     
-    input_file = args.input or ".env"
-    output_file = args.output or "ghost.env"
+    rules = _rules_from_args(args)
     
     try:
-        wrapped_count = write_ghost_env_file(input_file, output_file, signing_key)
-        print(f"✓ Converted {wrapped_count} environment variable(s)")
-        print(f"✓ Wrapped values written to: {output_file}")
+        wrapped_count = None
+        if input_file != "-" and output_file != "-":
+            wrapped_count = _delegate(
+                args,
+                lambda agent: agent.convert(
+                    input_file,
+                    output_file,
+                    rules,
+                    use_cache=not args.no_cache,
+                    profile=args.env_profile,
+                    compress=args.compress,
+                ),
+            )
+        if wrapped_count is None:
+            signing_key = ensure_signing_key()
+            cache = _token_cache(args, signing_key)
+            wrapped_count = write_ghost_env_file(
+                input_file,
+                output_file,
+                signing_key,
+                rules,
+                cache,
+                args.env_profile,
+                compress=args.compress,
+            )
+            if cache is not None:
+                cache.save()
+        print(f"✓ Converted {wrapped_count} environment variable(s)", file=status)
+        destination = "stdout" if output_file == "-" else output_file
+        print(f"✓ Wrapped values written to: {destination}", file=status)
         return 0
     except FileNotFoundError as e:
         print(f"Error: {e}", file=sys.stderr)
@@ -192,12 +440,115 @@ def cmd_convert(args: argparse.Namespace) -> int:
         return 1
 
 
+def cmd_bench_serve(args: argparse.Namespace) -> int:
+    """Load-test the bridge server and print the results as JSON."""
+    from ghost_env.bench import run_bench
+    
+    try:
+        results = run_bench(
+            clients=args.clients,
+            duration=args.duration,
+            mix=args.mix,
+            variables=args.variables,
+            value_size=args.value_size,
+            threaded=args.threaded,
+            requests_per_client=args.requests,
+            serve_args=shlex.split(args.serve_args or ""),
+        )
+    except (ValueError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    
+    report = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(report + "\n", encoding="utf-8")
+    else:
+        print(report)
+    return 0
+
+
+def cmd_agent(args: argparse.Namespace) -> int:
+    """Run the resident agent that other commands delegate to."""
+    from ghost_env import agent as agent_module
+    
+    if not hasattr(agent_module, "AgentServer"):
+        print("Error: The agent requires unix domain sockets", file=sys.stderr)
+        return 1
+    
+    socket_path = Path(args.socket) if args.socket else agent_module.get_agent_socket_path()
+    try:
+        server = agent_module.AgentServer(socket_path)
+    except (agent_module.AgentError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    
+    # Load the key and PyJWT up front so the first request is already warm
+    server.state.signing_key
+    import jwt  # noqa: F401
+    
+    if args.daemon:
+        pid = os.fork()
+        if pid:
+            # Parent: hand the socket over to the child without unlinking it
+            server.socket.close()
+            _print_agent_env(socket_path, pid)
+            return 0
+        os.setsid()
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+    else:
+        _print_agent_env(socket_path, os.getpid())
+    
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def _print_agent_env(socket_path: Path, pid: int) -> None:
+    """Print shell statements that point later commands at the agent."""
+    from ghost_env.agent import AGENT_SOCKET_ENV
+    
+    print(f"{AGENT_SOCKET_ENV}={shlex.quote(str(socket_path))}; export {AGENT_SOCKET_ENV};")
+    print(f"echo Agent pid {pid};")
+    sys.stdout.flush()
+
+
 def main() -> int:
     """Main CLI entry point."""
     parser = argparse.ArgumentParser(
         description="ghost_env - Secure environment variable bridge for AI-powered IDEs"
     )
     
+    parser.add_argument(
+        "--no-agent",
+        action="store_true",
+        help="Do not delegate to a running ghost-env agent"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_const",
+        const="timing",
+        help="Print a per-phase timing breakdown to stderr"
+    )
+    parser.add_argument(
+        "--cprofile",
+        dest="profile",
+        action="store_const",
+        const="cprofile",
+        help="Print cProfile statistics to stderr"
+    )
+    parser.add_argument(
+        "--profile-output",
+        type=str,
+        help="Write the --profile report (cProfile: binary stats) to this file"
+    )
+    
     subparsers = parser.add_subparsers(dest="command", help="Command to run")
     
     # init command
@@ -208,6 +559,38 @@ def main() -> int:
     serve_parser.add_argument("--port", type=int, default=8787, help="Port to serve on (default: 8787)")
     serve_parser.add_argument("--env-file", type=str, help="Path to .env file (default: .env)")
     serve_parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
+    serve_parser.add_argument(
+        "--expires-in-days",
+        type=int,
+        default=365,
+        help="Lifetime of served tokens in days (default: 365)"
+    )
+    serve_parser.add_argument(
+        "--refresh-margin",
+        type=float,
+        default=86400.0,
+        help="Re-wrap tokens this many seconds before they expire (default: 86400)"
+    )
+    serve_parser.add_argument(
+        "--threaded",
+        action="store_true",
+        help="Serve connections concurrently with HTTP/1.1 keep-alive (required for /events)"
+    )
+    serve_parser.add_argument(
+        "--watch",
+        type=float,
+        default=2.0,
+        help="Seconds between checks of the .env file for changes; 0 disables (default: 2)"
+    )
+    serve_parser.add_argument(
+        "--lazy",
+        action="store_true",
+        help="Start serving immediately and wrap each key on first request, warming the rest in the background"
+    )
+    _add_profile_argument(serve_parser)
+    _add_rule_arguments(serve_parser)
+    _add_cache_argument(serve_parser)
+    _add_compress_argument(serve_parser)
     
     # rotate command
     rotate_parser = subparsers.add_parser("rotate", help="Rotate the signing key")
@@ -215,27 +598,133 @@ def main() -> int:
     # wrap command
     wrap_parser = subparsers.add_parser("wrap", help="Wrap environment variables")
     wrap_parser.add_argument("--env-file", type=str, default=".env", help="Path to .env file")
-    wrap_parser.add_argument("--format", choices=["json", "env"], default="json", help="Output format")
+    wrap_parser.add_argument(
+        "--format",
+        choices=["json", "env", "docker", "k8s"],
+        default="json",
+        help="Output format for stdout when no --output is given"
+    )
+    wrap_parser.add_argument(
+        "--output", "-o",
+        action="append",
+        metavar="FORMAT:PATH",
+        help="Write to PATH (- for stdout) as env, json, docker or k8s; repeatable"
+    )
+    wrap_parser.add_argument(
+        "--secret-name",
+        type=str,
+        default="ghost-env",
+        help="metadata.name of generated Kubernetes Secrets (default: ghost-env)"
+    )
+    _add_profile_argument(wrap_parser)
+    _add_rule_arguments(wrap_parser)
+    _add_cache_argument(wrap_parser)
+    _add_compress_argument(wrap_parser)
     
     # unwrap command
     unwrap_parser = subparsers.add_parser("unwrap", help="Unwrap a JWT token")
     unwrap_parser.add_argument("token", nargs="?", help="The JWT token to unwrap")
+    unwrap_source = unwrap_parser.add_mutually_exclusive_group()
+    unwrap_source.add_argument(
+        "--file", "-f",
+        type=str,
+        help="Unwrap every token or KEY=token line in this file (e.g. ghost.env)"
+    )
+    unwrap_source.add_argument(
+        "--stdin",
+        action="store_true",
+        help="Unwrap every token or KEY=token line read from stdin"
+    )
+    unwrap_parser.add_argument(
+        "--format",
+        choices=["raw", "dotenv", "export", "json"],
+        default="raw",
+        help="Output format for --file/--stdin (default: raw)"
+    )
     
     # convert command
     convert_parser = subparsers.add_parser(
         "convert",
         help="Convert .env file to ghost.env file with wrapped values"
     )
+    convert_parser.add_argument(
+        "source",
+        nargs="?",
+        help="Input .env file path, or - for stdin (same as --input)"
+    )
+    convert_parser.add_argument(
+        "destination",
+        nargs="?",
+        help="Output ghost.env file path, or - for stdout (same as --output)"
+    )
     convert_parser.add_argument(
         "--input", "-i",
         type=str,
-        help="Input .env file path (default: .env)"
+        help="Input .env file path, or - for stdin (default: .env)"
     )
     convert_parser.add_argument(
         "--output", "-o",
         type=str,
-        help="Output ghost.env file path (default: ghost.env)"
+        help="Output ghost.env file path, or - for stdout (default: ghost.env)"
     )
+    _add_profile_argument(convert_parser)
+    _add_rule_arguments(convert_parser)
+    _add_cache_argument(convert_parser)
+    _add_compress_argument(convert_parser)
+    
+    # agent command
+    agent_parser = subparsers.add_parser(
+        "agent",
+        help="Run a resident agent that holds the signing key for other commands"
+    )
+    agent_parser.add_argument(
+        "--socket",
+        type=str,
+        help="Unix socket path (default: $GHOST_ENV_AGENT_SOCK or the config directory)"
+    )
+    agent_parser.add_argument(
+        "--daemon", "-d",
+        action="store_true",
+        help="Fork into the background after binding the socket"
+    )
+    
+    # bench-serve command
+    bench_parser = subparsers.add_parser(
+        "bench-serve",
+        help="Load-test the bridge server with concurrent keep-alive clients"
+    )
+    bench_parser.add_argument("--clients", type=int, default=8, help="Concurrent clients (default: 8)")
+    bench_parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load (default: 10)")
+    bench_parser.add_argument(
+        "--requests",
+        type=int,
+        help="Stop each client after this many requests"
+    )
+    bench_parser.add_argument(
+        "--mix",
+        type=str,
+        default="env=8,unwrap=1,health=1",
+        help="Weighted request mix (default: env=8,unwrap=1,health=1)"
+    )
+    bench_parser.add_argument(
+        "--variables",
+        type=int,
+        default=100,
+        help="Variables in the synthetic .env file (default: 100)"
+    )
+    bench_parser.add_argument(
+        "--value-size",
+        type=int,
+        default=32,
+        help="Length of synthetic secret values (default: 32)"
+    )
+    bench_parser.add_argument("--threaded", action="store_true", help="Benchmark the threaded server")
+    bench_parser.add_argument(
+        "--serve-args",
+        type=str,
+        help="Extra arguments for 'ghost-env serve', e.g. \"--selective\""
+    )
+    bench_parser.add_argument("--output", "-o", type=str, help="Write the JSON report to this file")
     
     args = parser.parse_args()
     
@@ -243,6 +732,21 @@ def main() -> int:
         parser.print_help()
         return 1
     
+    if args.profile:
+        return _run_profiled(args, lambda: _dispatch(args, parser))
+    return _dispatch(args, parser)
+
+
+def _dispatch(args: argparse.Namespace, parser: argparse.ArgumentParser) -> int:
+    """Run the selected subcommand."""
+    try:
+        return _run_command(args, parser)
+    except DelegationError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+def _run_command(args: argparse.Namespace, parser: argparse.ArgumentParser) -> int:
     if args.command == "init":
         return cmd_init(args)
     elif args.command == "serve":
@@ -255,11 +759,49 @@ def main() -> int:
         return cmd_unwrap(args)
     elif args.command == "convert":
         return cmd_convert(args)
+    elif args.command == "agent":
+        return cmd_agent(args)
+    elif args.command == "bench-serve":
+        return cmd_bench_serve(args)
     else:
         parser.print_help()
         return 1
 
 
+def _run_profiled(args: argparse.Namespace, run: Callable[[], int]) -> int:
+    """Run a command under --profile and report to stderr (or --profile-output)."""
+    start = time.perf_counter()
+    
+    if args.profile == "cprofile":
+        import cProfile
+        import pstats
+        
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(run)
+        finally:
+            if args.profile_output:
+                profiler.dump_stats(args.profile_output)
+                print(f"cProfile stats written to: {args.profile_output}", file=sys.stderr)
+            else:
+                stats = pstats.Stats(profiler, stream=sys.stderr)
+                stats.sort_stats("cumulative").print_stats(25)
+    
+    from ghost_env.profiling import TimingCollector, add_span_hook, remove_span_hook
+    
+    collector = TimingCollector()
+    add_span_hook(collector)
+    try:
+        return run()
+    finally:
+        remove_span_hook(collector)
+        report = collector.format_report(time.perf_counter() - start)
+        if args.profile_output:
+            Path(args.profile_output).write_text(report + "\n", encoding="utf-8")
+        else:
+            print(report, file=sys.stderr)
+
+
 if __name__ == "__main__":
     sys.exit(main())
 
@@ -2,10 +2,16 @@
 
 import os
 import json
+import tempfile
+import time
 from pathlib import Path
 from typing import Optional
 
 from ghost_env.jwt_wrapper import generate_signing_key
+from ghost_env.profiling import traced
+
+# How many 10ms waits for a concurrently created key to become readable
+KEY_BOOTSTRAP_RETRIES = 500
 
 
 def get_config_dir() -> Path:
@@ -38,13 +44,58 @@ def load_signing_key() -> Optional[str]:
     """
     Load the signing key from the configuration directory.
     
+    Keys are only ever published by an atomic link or rename, so this
+    lock-free read never observes a partially written key.
+    
     Returns:
         The signing key if it exists, None otherwise
     """
     key_path = get_signing_key_path()
-    if key_path.exists():
-        return key_path.read_text(encoding="utf-8").strip()
-    return None
+    try:
+        key = key_path.read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    return key or None
+
+
+def get_token_cache_path() -> Path:
+    """Get the path to the persistent token cache."""
+    return get_config_dir() / "token_cache.json"
+
+
+def _write_private_temp(directory: Path, content: str, prefix: str = ".signing_key.") -> Path:
+    """Write content to a new owner-only temporary file in directory."""
+    fd, tmp_name = tempfile.mkstemp(prefix=prefix, suffix=".tmp", dir=str(directory))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+    if os.name != "nt":
+        os.chmod(tmp_name, 0o600)
+    return Path(tmp_name)
+
+
+def write_private_file(path: Path, content: str) -> None:
+    """
+    Atomically replace a file with content readable only by its owner.
+    
+    The content is written to a private temporary file and renamed into
+    place, so concurrent readers see either the old file or the new one.
+    
+    Args:
+        path: The file to replace
+        content: The new content
+    """
+    tmp_path = _write_private_temp(path.parent, content, prefix=f".{path.name}.")
+    try:
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink()
+        raise
 
 
 def save_signing_key(key: str) -> None:
@@ -54,35 +105,85 @@ def save_signing_key(key: str) -> None:
     Args:
         key: The signing key to save
     """
-    key_path = get_signing_key_path()
-    # Set restrictive permissions (Unix-like systems)
-    key_path.write_text(key, encoding="utf-8")
-    if os.name != "nt":
-        os.chmod(key_path, 0o600)
+    write_private_file(get_signing_key_path(), key)
 
 
+def _create_signing_key(key: str) -> bool:
+    """
+    Publish a key only if none exists yet.
+    
+    Returns:
+        True if this call created the key file, False if another process won
+    """
+    key_path = get_signing_key_path()
+    tmp_path = _write_private_temp(key_path.parent, key)
+    try:
+        # Hard-linking a complete file is an atomic create-if-absent
+        os.link(tmp_path, key_path)
+        return True
+    except FileExistsError:
+        return False
+    except (AttributeError, NotImplementedError, OSError):
+        # Filesystem without hard links: exclusive create, then fill it in.
+        # Readers that catch it empty wait for the content (see ensure_signing_key).
+        try:
+            fd = os.open(str(key_path), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(key)
+        return True
+    finally:
+        tmp_path.unlink()
+
+
+@traced("ghost_env.ensure_signing_key")
 def ensure_signing_key() -> str:
     """
     Ensure a signing key exists, creating one if necessary.
     
+    Safe to call from many processes at once on a fresh machine: exactly one
+    of them publishes its key and all others return that same key. Once the
+    key exists this is a single unlocked file read.
+    
     Returns:
         The signing key
     """
     key = load_signing_key()
-    if key is None:
-        key = generate_signing_key()
-        save_signing_key(key)
-    return key
+    if key is not None:
+        return key
+    
+    candidate = generate_signing_key()
+    if _create_signing_key(candidate):
+        return candidate
+    
+    # Lost the race; the winner's key may still be being filled in
+    for _ in range(KEY_BOOTSTRAP_RETRIES):
+        key = load_signing_key()
+        if key is not None:
+            return key
+        time.sleep(0.01)
+    raise RuntimeError(f"Signing key at {get_signing_key_path()} exists but is empty")
 
 
 def rotate_signing_key() -> str:
     """
     Generate and save a new signing key, invalidating all previous tokens.
     
+    Cached tokens signed with the old key, and values unwrapped with it,
+    are purged as well.
+    
     Returns:
         The new signing key
     """
+    from ghost_env.shared_cache import clear_shared_cache
+    
     key = generate_signing_key()
     save_signing_key(key)
+    try:
+        get_token_cache_path().unlink()
+    except FileNotFoundError:
+        pass
+    clear_shared_cache()
     return key
 
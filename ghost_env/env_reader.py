@@ -1,22 +1,171 @@
 """Read and process .env files."""
 
+import io
 import os
+import sys
+import threading
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, TextIO, Tuple
 
-from ghost_env.jwt_wrapper import wrap_value, is_wrapped_token
+from ghost_env.jwt_wrapper import COMPRESS_THRESHOLD, wrap_value, is_wrapped_token
+from ghost_env.profiling import traced
+from ghost_env.rules import WrapRules
+from ghost_env.token_cache import TokenCache
 
 
-def read_env_file(env_path: Optional[str] = None) -> Dict[str, str]:
+def parse_env_line(line: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Parse a single KEY=VALUE line of a .env file.
+    
+    Args:
+        line: The raw line (with or without trailing newline)
+    
+    Returns:
+        A (key, value, quote) tuple where value has its surrounding quotes
+        removed and quote is '"', "'" or "" for unquoted values. None for
+        blank lines, comments and lines without '='.
+    """
+    line = line.strip()
+    
+    # Skip empty lines and comments
+    if not line or line.startswith("#") or "=" not in line:
+        return None
+    
+    key, value = line.split("=", 1)
+    key = key.strip()
+    value = value.strip()
+    
+    # Remove quotes if present
+    quote = ""
+    if value.startswith('"') and value.endswith('"'):
+        quote = '"'
+    elif value.startswith("'") and value.endswith("'"):
+        quote = "'"
+    if quote:
+        value = value[1:-1]
+    
+    return key, value, quote
+
+
+def env_layer_paths(env_path: Optional[str] = None, profile: Optional[str] = None) -> List[str]:
+    """
+    List the files that make up an environment, lowest precedence first.
+    
+    Without a profile this is just ``env_path``. With one, the stack is
+    ``.env`` < ``.env.local`` < ``.env.<profile>`` < ``.env.<profile>.local``
+    (named after ``env_path``), where later files override earlier ones.
+    
+    Args:
+        env_path: Path to the base .env file (default: .env)
+        profile: Optional profile name, e.g. "development"
+    
+    Returns:
+        The layer paths, whether or not they exist
+    
+    Raises:
+        ValueError: If the profile name is empty or contains a path separator
+    """
+    if env_path is None:
+        env_path = ".env"
+    if profile is None:
+        return [env_path]
+    if not profile or "/" in profile or os.sep in profile:
+        raise ValueError(f"Invalid profile name: {profile!r}")
+    return [env_path, f"{env_path}.local", f"{env_path}.{profile}", f"{env_path}.{profile}.local"]
+
+
+def _parse_env_path(env_path: str) -> Dict[str, str]:
+    env_vars = {}
+    
+    with open(env_path, "r", encoding="utf-8") as f:
+        for line in f:
+            parsed = parse_env_line(line)
+            if parsed is not None:
+                key, value, _ = parsed
+                env_vars[key] = value
+    
+    return env_vars
+
+
+# Parsed layers and merged stacks, keyed by absolute path(s) and
+# invalidated by (mtime_ns, size, inode) stat signatures
+_layer_cache: Dict[str, Tuple[Tuple[int, int, int], Dict[str, str]]] = {}
+_stack_cache: Dict[Tuple[str, ...], Tuple[Tuple, Dict[str, str]]] = {}
+_layer_lock = threading.Lock()
+
+
+def _read_layers(paths: List[str]) -> Dict[str, str]:
+    """Merge layer files, re-parsing only the layers whose stat signature changed."""
+    absolute = tuple(os.path.abspath(path) for path in paths)
+    stamps = []
+    for path in absolute:
+        try:
+            st = os.stat(path)
+            stamps.append((st.st_mtime_ns, st.st_size, st.st_ino))
+        except OSError:
+            stamps.append(None)
+    stamps = tuple(stamps)
+    
+    with _layer_lock:
+        cached = _stack_cache.get(absolute)
+        if cached is not None and cached[0] == stamps:
+            return dict(cached[1])
+        
+        merged: Dict[str, str] = {}
+        for path, stamp in zip(absolute, stamps):
+            if stamp is None:
+                _layer_cache.pop(path, None)
+                continue
+            layer = _layer_cache.get(path)
+            if layer is None or layer[0] != stamp:
+                layer = (stamp, _parse_env_path(path))
+                _layer_cache[path] = layer
+            merged.update(layer[1])
+        
+        _stack_cache[absolute] = (stamps, merged)
+        return dict(merged)
+
+
+def format_env_line(key: str, value: str) -> str:
+    """
+    Render a ``KEY=value`` line that :func:`parse_env_line` reads back as value.
+    
+    Values that are empty or contain whitespace, ``#`` or quotes are quoted,
+    since parsing strips surrounding whitespace and quotes.
+    
+    Args:
+        key: The environment variable name
+        value: The value to write
+    
+    Returns:
+        The line, without a trailing newline
+    """
+    if not value or any(c in value for c in " \t#'\""):
+        quote = "'" if '"' in value else '"'
+        return f"{key}={quote}{value}{quote}"
+    return f"{key}={value}"
+
+
+@traced("ghost_env.read_env_file", lambda env_path=None, profile=None: {"path": str(env_path or ".env")})
+def read_env_file(env_path: Optional[str] = None, profile: Optional[str] = None) -> Dict[str, str]:
     """
     Read a .env file and return key-value pairs.
     
+    With a profile, the layers from :func:`env_layer_paths` are merged
+    (missing layers are skipped). The merged result is cached by the layer
+    files' stat signatures, so after an edit only the changed layer is
+    parsed again.
+    
     Args:
         env_path: Path to the .env file. If None, searches for .env in current directory.
+        profile: Optional profile name to layer overrides on top of env_path
     
     Returns:
         Dictionary of environment variable key-value pairs
     """
+    if profile is not None:
+        return _read_layers(env_layer_paths(env_path, profile))
+    
     if env_path is None:
         env_path = ".env"
     
@@ -24,55 +173,62 @@ def read_env_file(env_path: Optional[str] = None) -> Dict[str, str]:
     if not env_file.exists():
         return {}
     
-    env_vars = {}
-    
-    with open(env_file, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            
-            # Skip empty lines and comments
-            if not line or line.startswith("#"):
-                continue
-            
-            # Parse KEY=VALUE format
-            if "=" in line:
-                key, value = line.split("=", 1)
-                key = key.strip()
-                value = value.strip()
-                
-                # Remove quotes if present
-                if value.startswith('"') and value.endswith('"'):
-                    value = value[1:-1]
-                elif value.startswith("'") and value.endswith("'"):
-                    value = value[1:-1]
-                
-                env_vars[key] = value
-    
-    return env_vars
+    return _parse_env_path(env_path)
+
+
+def _wrap_one(
+    value: str,
+    signing_key: str,
+    expires_in_days: int,
+    cache: Optional[TokenCache],
+    compress: bool,
+) -> str:
+    """Wrap one value, through the token cache if there is one."""
+    if cache is not None:
+        return cache.wrap(value, expires_in_days, compress)
+    return wrap_value(value, signing_key, expires_in_days, COMPRESS_THRESHOLD if compress else None)
 
 
-def wrap_env_file(env_vars: Dict[str, str], signing_key: str) -> Dict[str, str]:
+@traced("ghost_env.wrap_env_file")
+def wrap_env_file(
+    env_vars: Dict[str, str],
+    signing_key: str,
+    rules: Optional[WrapRules] = None,
+    expires_in_days: int = 365,
+    cache: Optional[TokenCache] = None,
+    compress: bool = False,
+) -> Dict[str, str]:
     """
-    Wrap all environment variable values in JWT tokens.
+    Wrap environment variable values in JWT tokens.
     
     Args:
         env_vars: Dictionary of environment variable key-value pairs
         signing_key: The secret key used to sign the JWTs
+        rules: Optional wrapping rules; values they reject pass through as
+            plaintext. If None, every value is wrapped.
+        expires_in_days: Token expiration time in days (default: 365)
+        cache: Optional token cache for signing_key; previously issued
+            tokens are reused instead of re-signing (the caller saves it)
+        compress: Store large values compressed (see
+            :data:`ghost_env.jwt_wrapper.COMPRESS_THRESHOLD`)
     
     Returns:
         Dictionary with wrapped values (keys remain the same)
     """
     wrapped = {}
     for key, value in env_vars.items():
-        # Skip already wrapped tokens
+        # Skip already wrapped tokens and values the rules leave in plaintext
         if is_wrapped_token(value):
             wrapped[key] = value
+        elif rules is not None and not rules.should_wrap(key, value):
+            wrapped[key] = value
         else:
-            wrapped[key] = wrap_value(value, signing_key)
+            wrapped[key] = _wrap_one(value, signing_key, expires_in_days, cache, compress)
     
     return wrapped
 
 
+@traced("ghost_env.unwrap_env_vars")
 def unwrap_env_vars(env_vars: Dict[str, str], signing_key: str) -> Dict[str, str]:
     """
     Unwrap JWT tokens in environment variables.
@@ -101,75 +257,159 @@ def unwrap_env_vars(env_vars: Dict[str, str], signing_key: str) -> Dict[str, str
     return unwrapped
 
 
-def write_ghost_env_file(env_path: str, output_path: str, signing_key: str) -> int:
+@traced("ghost_env.convert_env_stream")
+def convert_env_stream(
+    infile: TextIO,
+    outfile: TextIO,
+    signing_key: str,
+    rules: Optional[WrapRules] = None,
+    flush: bool = False,
+    cache: Optional[TokenCache] = None,
+    compress: bool = False,
+) -> int:
     """
-    Convert a .env file to a ghost.env file with wrapped values.
-    Preserves comments and formatting from the original file.
+    Convert .env content to ghost.env content one line at a time.
+    
+    Only the current line is held in memory, so arbitrarily large streams
+    convert in constant memory and each output line is written as soon as
+    its input line has been read. Comments, blank lines and quoting style
+    are preserved.
     
     Args:
-        env_path: Path to the input .env file
-        output_path: Path to the output ghost.env file
+        infile: Text stream to read .env lines from
+        outfile: Text stream to write ghost.env lines to
         signing_key: The secret key used to sign the JWTs
+        rules: Optional wrapping rules; lines whose values they reject are
+            copied through unchanged and not counted
+        flush: Flush the output after every line (for pipes)
+        cache: Optional token cache for signing_key (the caller saves it)
+        compress: Store large values compressed
     
     Returns:
         Number of variables wrapped
     """
-    env_file = Path(env_path)
-    if not env_file.exists():
-        raise FileNotFoundError(f"Environment file not found: {env_path}")
-    
-    output_file = Path(output_path)
     wrapped_count = 0
     
-    # Read original file to preserve comments and formatting
-    with open(env_file, "r", encoding="utf-8") as infile:
-        lines = infile.readlines()
-    
-    # Read env vars to get wrapped values
-    env_vars = read_env_file(env_path)
-    wrapped_vars = wrap_env_file(env_vars, signing_key)
-    
-    # Write output file
-    with open(output_file, "w", encoding="utf-8") as outfile:
-        for line in lines:
-            original_line = line
-            line = line.strip()
-            
-            # Preserve empty lines and comments
-            if not line or line.startswith("#"):
-                outfile.write(original_line)
-                continue
+    for line in infile:
+        parsed = parse_env_line(line)
+        
+        if parsed is None:
+            # Keep comments, blank lines and lines that don't match KEY=VALUE
+            outfile.write(line)
+        else:
+            key, value, quote = parsed
+            if is_wrapped_token(value):
+                wrapped_value = value
+            elif rules is not None and not rules.should_wrap(key, value):
+                wrapped_value = None
+            else:
+                wrapped_value = _wrap_one(value, signing_key, 365, cache, compress)
             
-            # Process KEY=VALUE lines
-            if "=" in line:
-                key, value = line.split("=", 1)
-                key = key.strip()
-                original_value = value.strip()
-                
-                # Remove quotes if present for comparison
-                unquoted_value = original_value
-                if unquoted_value.startswith('"') and unquoted_value.endswith('"'):
-                    unquoted_value = unquoted_value[1:-1]
-                elif unquoted_value.startswith("'") and unquoted_value.endswith("'"):
-                    unquoted_value = unquoted_value[1:-1]
-                
-                # Replace with wrapped value if it exists
-                if key in wrapped_vars:
-                    wrapped_value = wrapped_vars[key]
-                    # Preserve original quoting style if present
-                    if original_value.startswith('"') and original_value.endswith('"'):
-                        outfile.write(f'{key}="{wrapped_value}"\n')
-                    elif original_value.startswith("'") and original_value.endswith("'"):
-                        outfile.write(f"{key}='{wrapped_value}'\n")
-                    else:
-                        outfile.write(f"{key}={wrapped_value}\n")
-                    wrapped_count += 1
-                else:
-                    # Keep original line if key not found (shouldn't happen)
-                    outfile.write(original_line)
+            if wrapped_value is None:
+                # Plaintext-safe value passed through by the rules
+                outfile.write(line)
             else:
-                # Keep lines that don't match KEY=VALUE format
-                outfile.write(original_line)
+                # Preserve original quoting style if present
+                outfile.write(f"{key}={quote}{wrapped_value}{quote}\n")
+                wrapped_count += 1
+        
+        if flush:
+            outfile.flush()
     
     return wrapped_count
 
+
+def write_ghost_env_file(
+    env_path: str,
+    output_path: str,
+    signing_key: str,
+    rules: Optional[WrapRules] = None,
+    cache: Optional[TokenCache] = None,
+    profile: Optional[str] = None,
+    compress: bool = False,
+) -> int:
+    """
+    Convert a .env file to a ghost.env file with wrapped values.
+    Preserves comments and formatting from the original file.
+    
+    Either path may be "-" to read from stdin or write to stdout; the
+    conversion is streamed line by line (see :func:`convert_env_stream`).
+    
+    With a profile, the merged layers (see :func:`env_layer_paths`) are
+    written as ``KEY=value`` lines instead; comments are not carried over.
+    
+    Args:
+        env_path: Path to the input .env file, or "-" for stdin
+        output_path: Path to the output ghost.env file, or "-" for stdout
+        signing_key: The secret key used to sign the JWTs
+        rules: Optional wrapping rules; lines whose values they reject are
+            copied through unchanged and not counted
+        cache: Optional token cache for signing_key (the caller saves it)
+        profile: Optional profile name to layer overrides on top of env_path
+        compress: Store large values compressed
+    
+    Returns:
+        Number of variables wrapped
+    """
+    if profile is not None:
+        return _write_layered_ghost_env_file(
+            env_path, output_path, signing_key, rules, cache, profile, compress
+        )
+    
+    if env_path != "-" and not Path(env_path).exists():
+        raise FileNotFoundError(f"Environment file not found: {env_path}")
+    
+    if env_path == "-":
+        infile = sys.stdin
+    else:
+        infile = open(env_path, "r", encoding="utf-8")
+    
+    try:
+        if output_path == "-":
+            return convert_env_stream(
+                infile, sys.stdout, signing_key, rules, flush=True, cache=cache, compress=compress
+            )
+        
+        if env_path != "-" and Path(output_path).exists() and os.path.samefile(env_path, output_path):
+            # Converting in place: the output would truncate the input
+            with infile:
+                infile = io.StringIO(infile.read())
+        
+        with open(output_path, "w", encoding="utf-8") as outfile:
+            return convert_env_stream(
+                infile, outfile, signing_key, rules, cache=cache, compress=compress
+            )
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+
+
+def _write_layered_ghost_env_file(
+    env_path: str,
+    output_path: str,
+    signing_key: str,
+    rules: Optional[WrapRules],
+    cache: Optional[TokenCache],
+    profile: str,
+    compress: bool,
+) -> int:
+    if env_path == "-":
+        raise ValueError("Profiles need a .env path to layer on, not stdin")
+    layers = env_layer_paths(env_path, profile)
+    if not any(Path(path).exists() for path in layers):
+        raise FileNotFoundError(f"Environment file not found: {env_path}")
+    
+    env_vars = read_env_file(env_path, profile)
+    # With a token cache, values from unchanged layers reuse their tokens
+    wrapped = wrap_env_file(env_vars, signing_key, rules, cache=cache, compress=compress)
+    lines = "".join(f"{format_env_line(key, value)}\n" for key, value in wrapped.items())
+    
+    if output_path == "-":
+        sys.stdout.write(lines)
+        sys.stdout.flush()
+    else:
+        with open(output_path, "w", encoding="utf-8") as outfile:
+            outfile.write(lines)
+    # Count like convert_env_stream: every token in the output, including
+    # values that were already wrapped in the input
+    return sum(1 for value in wrapped.values() if is_wrapped_token(value))
@@ -0,0 +1,203 @@
+"""Writers that export one set of wrapped variables to several formats."""
+
+import json
+import os
+import sys
+import tempfile
+from typing import Dict, List, Optional, TextIO, Tuple, Type
+
+from ghost_env.env_reader import format_env_line
+
+
+class ExportWriter:
+    """
+    Base class for streaming exporters.
+
+    Writers receive variables one at a time between :meth:`begin` and
+    :meth:`end`, so several of them can be fed from a single pass.
+    """
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+
+    @classmethod
+    def check(cls, key: str, value: str) -> None:
+        """
+        Raise ValueError if this format cannot hold the variable.
+
+        Called for every variable before any target is opened.
+        """
+
+    def begin(self) -> None:
+        """Write anything that precedes the first variable."""
+
+    def write(self, key: str, value: str) -> None:
+        """Write one variable."""
+        raise NotImplementedError
+
+    def end(self) -> None:
+        """Write anything that follows the last variable."""
+
+
+class EnvWriter(ExportWriter):
+    """ghost.env style ``KEY=value`` lines, quoted where parsing would alter the value."""
+
+    def write(self, key: str, value: str) -> None:
+        self.stream.write(format_env_line(key, value) + "\n")
+
+
+class DockerEnvWriter(ExportWriter):
+    """``docker run --env-file`` format: unquoted, single-line values."""
+
+    @classmethod
+    def check(cls, key: str, value: str) -> None:
+        if "\n" in value or "\r" in value:
+            raise ValueError(f"Docker env files cannot hold multi-line values ({key})")
+
+    def write(self, key: str, value: str) -> None:
+        self.check(key, value)
+        self.stream.write(f"{key}={value}\n")
+
+
+class JsonWriter(ExportWriter):
+    """A JSON object, laid out like ``json.dumps(..., indent=2)``."""
+
+    def begin(self) -> None:
+        self._count = 0
+
+    def write(self, key: str, value: str) -> None:
+        prefix = "{\n" if self._count == 0 else ",\n"
+        self.stream.write(f"{prefix}  {json.dumps(key)}: {json.dumps(value)}")
+        self._count += 1
+
+    def end(self) -> None:
+        self.stream.write("\n}\n" if self._count else "{}\n")
+
+
+class KubernetesSecretWriter(ExportWriter):
+    """A Kubernetes ``Secret`` manifest carrying the values as ``stringData``."""
+
+    def __init__(self, stream: TextIO, secret_name: str = "ghost-env"):
+        super().__init__(stream)
+        self.secret_name = secret_name
+
+    def begin(self) -> None:
+        # JSON strings are valid YAML double-quoted scalars
+        self.stream.write(
+            "apiVersion: v1\n"
+            "kind: Secret\n"
+            "metadata:\n"
+            f"  name: {json.dumps(self.secret_name)}\n"
+            "type: Opaque\n"
+            "stringData:\n"
+        )
+
+    def write(self, key: str, value: str) -> None:
+        self.stream.write(f"  {json.dumps(key)}: {json.dumps(value)}\n")
+
+
+WRITERS: Dict[str, Type[ExportWriter]] = {
+    "env": EnvWriter,
+    "json": JsonWriter,
+    "docker": DockerEnvWriter,
+    "k8s": KubernetesSecretWriter,
+}
+
+
+def parse_target(spec: str) -> Tuple[str, str]:
+    """
+    Parse a ``FORMAT:PATH`` export target (PATH may be "-" for stdout).
+
+    Raises:
+        ValueError: If the spec is malformed or the format is unknown
+    """
+    fmt, sep, path = spec.partition(":")
+    if not sep or not path:
+        raise ValueError(f"Invalid output target '{spec}', expected FORMAT:PATH")
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown output format '{fmt}' (expected one of {', '.join(WRITERS)})")
+    return fmt, path
+
+
+def _target_mode(path: str) -> int:
+    """Mode for a rewritten target: keep an existing file's, else what open() would use."""
+    try:
+        return os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def export_wrapped(
+    wrapped_vars: Dict[str, str],
+    targets: List[Tuple[str, str]],
+    secret_name: str = "ghost-env",
+    stdout: Optional[TextIO] = None,
+) -> None:
+    """
+    Write the same wrapped variables to every target in a single pass.
+
+    Every variable is checked against every format before anything is
+    written, and file targets are written to temporary files that replace
+    the targets only once all of them are complete, so a failure leaves
+    existing files untouched.
+
+    Args:
+        wrapped_vars: Wrapped variables, typically from wrap_env_file
+        targets: (format, path) pairs; path "-" writes to stdout
+        secret_name: metadata.name for Kubernetes manifests
+        stdout: Stream used for "-" targets (default: sys.stdout)
+
+    Raises:
+        ValueError: If a format cannot hold one of the variables
+        OSError: If a target cannot be written
+    """
+    if stdout is None:
+        stdout = sys.stdout
+
+    for fmt in {fmt for fmt, _ in targets}:
+        for key, value in wrapped_vars.items():
+            WRITERS[fmt].check(key, value)
+
+    writers: List[ExportWriter] = []
+    opened: List[TextIO] = []
+    # (temporary path, target path) for each file target
+    pending: List[Tuple[str, str]] = []
+    try:
+        for fmt, path in targets:
+            if path == "-":
+                stream = stdout
+            else:
+                fd, tmp_path = tempfile.mkstemp(
+                    dir=os.path.dirname(os.path.abspath(path)), prefix=".ghost_env."
+                )
+                pending.append((tmp_path, path))
+                os.chmod(tmp_path, _target_mode(path))
+                stream = os.fdopen(fd, "w", encoding="utf-8")
+                opened.append(stream)
+            if fmt == "k8s":
+                writers.append(KubernetesSecretWriter(stream, secret_name))
+            else:
+                writers.append(WRITERS[fmt](stream))
+
+        for writer in writers:
+            writer.begin()
+        for key, value in wrapped_vars.items():
+            for writer in writers:
+                writer.write(key, value)
+        for writer in writers:
+            writer.end()
+        for stream in opened:
+            stream.close()
+        for tmp_path, path in pending:
+            os.replace(tmp_path, path)
+        pending = []
+    finally:
+        for stream in opened:
+            stream.close()
+        for tmp_path, _ in pending:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
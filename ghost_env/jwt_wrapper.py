@@ -1,17 +1,77 @@
 """JWT wrapper for encoding and decoding environment values."""
 
-import jwt
+import base64
 import secrets
-from typing import Optional
+import zlib
+from typing import Any, Dict, Optional
 from datetime import datetime, timedelta
 
+from ghost_env.profiling import traced
+
+# With compression enabled, values at least this many characters long are
+# stored zlib-compressed when that makes the token smaller (PEM bundles,
+# service-account JSON, ...)
+COMPRESS_THRESHOLD = 1024
+
+# "enc" claim of compressed tokens; readers reject encodings they don't know
+# instead of mistaking the token for one without a value
+COMPRESSED_ENCODING = "zlib+b85"
+
+# Upper bound on a decompressed value, so a forged or corrupt payload
+# cannot balloon in memory
+MAX_DECOMPRESSED_SIZE = 16 * 1024 * 1024
+
 
 def generate_signing_key() -> str:
     """Generate a new signing key for JWT tokens."""
     return secrets.token_urlsafe(32)
 
 
-def wrap_value(value: str, signing_key: str, expires_in_days: int = 365) -> str:
+def _decompress(data: bytes) -> Optional[str]:
+    """Inflate a compressed value, or None if it is corrupt or too large."""
+    decompressor = zlib.decompressobj()
+    try:
+        raw = decompressor.decompress(data, MAX_DECOMPRESSED_SIZE)
+    except zlib.error:
+        return None
+    if decompressor.unconsumed_tail or not decompressor.eof:
+        return None
+    return raw.decode("utf-8", "surrogatepass")
+
+
+def _encode_value(value: str, compress_threshold: Optional[int]) -> Dict[str, Any]:
+    """Build the payload field carrying a value, compressed when that pays off."""
+    if compress_threshold is not None and len(value) >= compress_threshold:
+        # base85 is JSON-safe and denser than base64; the JWT encoding adds
+        # its own base64 layer on top, so every byte saved here counts
+        compressed = zlib.compress(value.encode("utf-8", "surrogatepass"), 9)
+        packed = base64.b85encode(compressed).decode("ascii")
+        if len(packed) < len(value):
+            return {"enc": COMPRESSED_ENCODING, "z": packed}
+    return {"value": value}
+
+
+def _decode_value(payload: Dict[str, Any]) -> Optional[str]:
+    """Recover the value from a verified payload, plain or compressed."""
+    enc = payload.get("enc")
+    if enc is None:
+        return payload.get("value")
+    if enc != COMPRESSED_ENCODING:
+        return None
+    try:
+        data = base64.b85decode(payload["z"])
+    except (KeyError, ValueError, TypeError):
+        return None
+    return _decompress(data)
+
+
+@traced("ghost_env.wrap_value")
+def wrap_value(
+    value: str,
+    signing_key: str,
+    expires_in_days: int = 365,
+    compress_threshold: Optional[int] = None,
+) -> str:
     """
     Wrap a sensitive value in a signed JWT token.
     
@@ -19,24 +79,32 @@ def wrap_value(value: str, signing_key: str, expires_in_days: int = 365) -> str:
         value: The plaintext value to wrap
         signing_key: The secret key used to sign the JWT
         expires_in_days: Token expiration time in days (default: 365)
+        compress_threshold: Minimum length at which the value is stored
+            zlib-compressed (only if that is smaller), e.g.
+            :data:`COMPRESS_THRESHOLD`. None (the default) never compresses,
+            keeping tokens readable by ghost_env releases without compression.
     
     Returns:
         A JWT token prefixed with 'gho_env.' for identification
     """
-    payload = {
-        "value": value,
-        "iat": datetime.utcnow(),
-        "exp": datetime.utcnow() + timedelta(days=expires_in_days),
-    }
+    # PyJWT is imported on first use so CLI paths served by the agent skip it
+    import jwt
+    
+    payload = _encode_value(value, compress_threshold)
+    payload["iat"] = datetime.utcnow()
+    payload["exp"] = datetime.utcnow() + timedelta(days=expires_in_days)
     
     token = jwt.encode(payload, signing_key, algorithm="HS256")
     return f"gho_env.{token}"
 
 
+@traced("ghost_env.unwrap_value")
 def unwrap_value(token: str, signing_key: str) -> Optional[str]:
     """
     Unwrap a JWT token to retrieve the original value.
     
+    Compressed payloads are detected and inflated automatically.
+    
     Args:
         token: The JWT token (with or without 'gho_env.' prefix)
         signing_key: The secret key used to verify the JWT signature
@@ -44,19 +112,48 @@ def unwrap_value(token: str, signing_key: str) -> Optional[str]:
     Returns:
         The unwrapped value if the token is valid, None otherwise
     """
+    import jwt
+    
     # Remove prefix if present
     if token.startswith("gho_env."):
         token = token[8:]
     
     try:
         payload = jwt.decode(token, signing_key, algorithms=["HS256"])
-        return payload.get("value")
+        return _decode_value(payload)
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
 
 
+def get_token_expiry(token: str) -> Optional[float]:
+    """
+    Read the expiration time of a token without verifying its signature.
+    
+    Only use this for scheduling (e.g. deciding when to re-wrap); it says
+    nothing about whether the token is authentic.
+    
+    Args:
+        token: The JWT token (with or without 'gho_env.' prefix)
+    
+    Returns:
+        The 'exp' claim as a Unix timestamp, or None if it cannot be read
+    """
+    import jwt
+    
+    if token.startswith("gho_env."):
+        token = token[8:]
+    
+    try:
+        payload = jwt.decode(token, options={"verify_signature": False})
+    except jwt.InvalidTokenError:
+        return None
+    
+    exp = payload.get("exp")
+    return float(exp) if exp is not None else None
+
+
 def is_wrapped_token(value: str) -> bool:
     """Check if a string is a ghost_env wrapped token."""
     return value.startswith("gho_env.") and len(value) > 20
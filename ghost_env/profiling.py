@@ -0,0 +1,130 @@
+"""Lightweight instrumentation hooks around ghost_env hot paths.
+
+Instrumented functions report spans named ``ghost_env.<function>`` to every
+registered hook. A hook is a callable ``hook(name, attributes)`` that
+returns a context manager wrapping the call, which is exactly the shape of
+an OpenTelemetry tracer's ``start_as_current_span``::
+
+    from opentelemetry import trace
+    from ghost_env.profiling import add_tracer
+
+    add_tracer(trace.get_tracer("ghost_env"))
+
+With no hooks registered, an instrumented call costs one list check.
+Attributes never include plaintext values or tokens.
+"""
+
+import functools
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional
+
+SpanHook = Callable[[str, Dict[str, Any]], ContextManager[Any]]
+
+_hooks: List[SpanHook] = []
+
+
+def add_span_hook(hook: SpanHook) -> None:
+    """Register a hook that is entered around every instrumented call."""
+    _hooks.append(hook)
+
+
+def remove_span_hook(hook: SpanHook) -> None:
+    """Unregister a hook added with :func:`add_span_hook` or :func:`add_tracer`."""
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+def add_tracer(tracer: Any) -> SpanHook:
+    """
+    Report spans to an OpenTelemetry-style tracer.
+
+    Args:
+        tracer: Any object with ``start_as_current_span(name, attributes=...)``
+
+    Returns:
+        The registered hook, for :func:`remove_span_hook`
+    """
+
+    def hook(name: str, attributes: Dict[str, Any]) -> ContextManager[Any]:
+        return tracer.start_as_current_span(name, attributes=attributes)
+
+    add_span_hook(hook)
+    return hook
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[None]:
+    """Report a span around a block to all registered hooks."""
+    if not _hooks:
+        yield
+        return
+    with ExitStack() as stack:
+        for hook in list(_hooks):
+            stack.enter_context(hook(name, attributes))
+        yield
+
+
+def traced(name: str, attributes: Optional[Callable[..., Dict[str, Any]]] = None) -> Callable:
+    """
+    Decorate a function so each call is reported as a span.
+
+    Args:
+        name: Span name
+        attributes: Optional function of the call's arguments returning span
+            attributes; only evaluated while hooks are registered
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _hooks:
+                return func(*args, **kwargs)
+            attrs = attributes(*args, **kwargs) if attributes is not None else {}
+            with span(name, **attrs):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class TimingCollector:
+    """
+    Span hook that aggregates call count and wall time per span name.
+
+    Nested spans are each timed in full, so a parent's time includes its
+    children.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals: Dict[str, List[float]] = {}
+
+    @contextmanager
+    def __call__(self, name: str, attributes: Dict[str, Any]) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                entry = self.totals.setdefault(name, [0, 0.0, 0.0])
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] = max(entry[2], elapsed)
+
+    def format_report(self, wall_time: Optional[float] = None) -> str:
+        """Render a per-phase table sorted by total time."""
+        lines = [f"{'phase':<32} {'calls':>8} {'total ms':>11} {'avg ms':>9} {'max ms':>9}"]
+        for name, (calls, total, worst) in sorted(
+            self.totals.items(), key=lambda item: item[1][1], reverse=True
+        ):
+            lines.append(
+                f"{name:<32} {int(calls):>8} {total * 1000:>11.3f} "
+                f"{total / calls * 1000:>9.3f} {worst * 1000:>9.3f}"
+            )
+        if wall_time is not None:
+            lines.append(f"{'wall time':<32} {'':>8} {wall_time * 1000:>11.3f}")
+        return "\n".join(lines)
@@ -0,0 +1,649 @@
+"""HTTP bridge server for wrapped environment variables."""
+
+import json
+import logging
+import os
+import threading
+import time
+import urllib.parse
+from collections import deque
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from ghost_env.env_reader import env_layer_paths, read_env_file, wrap_env_file
+from ghost_env.jwt_wrapper import get_token_expiry, is_wrapped_token, unwrap_value
+from ghost_env.rules import WrapRules
+from ghost_env.token_cache import TokenCache
+
+logger = logging.getLogger(__name__)
+
+
+class EnvSnapshot:
+    """
+    Immutable set of wrapped variables served at one point in time.
+
+    The JSON body for ``/env.json`` is encoded once per snapshot so requests
+    only copy bytes. Snapshots are never mutated; a refresh builds a new one
+    and swaps the reference, which is atomic for concurrent readers.
+    """
+
+    def __init__(self, wrapped: Dict[str, str], expiries: Dict[str, float], version: int = 1):
+        self.wrapped = wrapped
+        self.expiries = expiries
+        self.version = version
+        self.earliest_expiry: Optional[float] = min(expiries.values()) if expiries else None
+        self.body = json.dumps(wrapped).encode("utf-8")
+
+
+def diff_snapshots(old: Dict[str, str], new: Dict[str, str]) -> Dict[str, Any]:
+    """Compute added, changed and removed keys between two wrapped maps."""
+    return {
+        "added": {key: value for key, value in new.items() if key not in old},
+        "changed": {
+            key: value for key, value in new.items() if key in old and old[key] != value
+        },
+        "removed": [key for key in old if key not in new],
+    }
+
+
+class EnvServerState:
+    """
+    Shared state behind the bridge server: plaintext index, key and snapshot.
+
+    Tokens issued by the server are tracked by their ``exp`` claim. When the
+    earliest one comes within ``refresh_margin`` seconds of expiring,
+    :meth:`refresh` re-wraps only the tokens inside that window and reuses
+    every token that is still fresh.
+
+    Every published snapshot that differs from the previous one gets the
+    next version number. Recent snapshots are kept so clients can ask for
+    only what changed since the version they have (:meth:`delta`), and
+    :meth:`wait_for_version` lets event streams block until a change.
+
+    With ``lazy=True`` nothing is signed up front. :meth:`wrap_keys` signs
+    and memoizes individual keys on first request, and the first snapshot
+    is only built by :meth:`warm` (typically from a :class:`SnapshotWarmer`)
+    or when something needs the full set. Until then, reading
+    :attr:`snapshot` blocks while the remaining keys are wrapped.
+    """
+
+    def __init__(
+        self,
+        env_vars: Dict[str, str],
+        signing_key: str,
+        rules: Optional[WrapRules] = None,
+        expires_in_days: int = 365,
+        refresh_margin: float = 86400.0,
+        history: int = 64,
+        cache: Optional[TokenCache] = None,
+        lazy: bool = False,
+        compress: bool = False,
+    ):
+        self.env_vars = env_vars
+        self.signing_key = signing_key
+        self.rules = rules
+        self.expires_in_days = expires_in_days
+        self.compress = compress
+        self.refresh_margin = refresh_margin
+        # Reentrant: refresh() and reload() may trigger warm() while holding it
+        self._lock = threading.RLock()
+        self._changed = threading.Condition()
+        self._history: Deque[EnvSnapshot] = deque(maxlen=history)
+        self.closed = False
+        # The persistent cache only seeds the first snapshot; later rebuilds
+        # exist precisely to replace tokens, so they always sign afresh
+        self._cache = cache
+        self._snapshot: Optional[EnvSnapshot] = None
+        # Tokens wrapped on demand before the first snapshot exists
+        self._memo: Dict[str, str] = {}
+        self._memo_expiries: Dict[str, float] = {}
+        if not lazy:
+            self.warm()
+
+    @property
+    def snapshot(self) -> EnvSnapshot:
+        """The snapshot currently being served, built first if still lazy."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.warm()
+        return snapshot
+
+    @snapshot.setter
+    def snapshot(self, snapshot: EnvSnapshot) -> None:
+        self._snapshot = snapshot
+
+    @property
+    def warmed(self) -> bool:
+        """Whether every key has been wrapped into a snapshot."""
+        return self._snapshot is not None
+
+    def warm(self) -> EnvSnapshot:
+        """
+        Wrap every key not wrapped yet and publish the first snapshot.
+
+        Tokens already memoized by :meth:`wrap_keys` are reused. Saves the
+        token cache, if any, once the snapshot is built.
+        """
+        with self._lock:
+            if self._snapshot is None:
+                partial = EnvSnapshot(self._memo, self._memo_expiries)
+                snapshot = self.build_snapshot(partial, cache=self._cache)
+                self._history.append(snapshot)
+                self._snapshot = snapshot
+                self._memo, self._memo_expiries = {}, {}
+                if self._cache is not None:
+                    self._cache.save()
+                    self._cache = None
+            return self._snapshot
+
+    def wrap_keys(self, keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Return the wrapped values of the given keys, wrapping them on first use.
+
+        Args:
+            keys: Keys to look up; keys missing from the index are skipped
+
+        Returns:
+            Dictionary of wrapped values in the order requested
+        """
+        keys = list(keys)
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None:
+                    missing = {
+                        key: self.env_vars[key]
+                        for key in keys
+                        if key in self.env_vars and key not in self._memo
+                    }
+                    if missing:
+                        fresh = wrap_env_file(
+                            missing,
+                            self.signing_key,
+                            self.rules,
+                            self.expires_in_days,
+                            self._cache,
+                            self.compress,
+                        )
+                        self._track(missing, fresh, self._memo, self._memo_expiries)
+                    return {key: self._memo[key] for key in keys if key in self._memo}
+        return {key: snapshot.wrapped[key] for key in keys if key in snapshot.wrapped}
+
+    def build_snapshot(
+        self,
+        previous: Optional[EnvSnapshot] = None,
+        modified: Iterable[str] = (),
+        cache: Optional[TokenCache] = None,
+    ) -> EnvSnapshot:
+        """
+        Build a snapshot, reusing tokens from ``previous`` that are still fresh.
+
+        Args:
+            previous: The snapshot currently being served, if any
+            modified: Keys whose plaintext changed since ``previous``
+            cache: Optional token cache to reuse previously issued tokens
+
+        Returns:
+            A new (unversioned) snapshot covering every variable in the index
+        """
+        deadline = time.time() + self.refresh_margin
+        modified = set(modified)
+        wrapped: Dict[str, str] = {}
+        expiries: Dict[str, float] = {}
+        stale: Dict[str, str] = {}
+
+        for key, value in self.env_vars.items():
+            if previous is not None and key in previous.wrapped and key not in modified:
+                exp = previous.expiries.get(key)
+                if exp is None or exp > deadline:
+                    wrapped[key] = previous.wrapped[key]
+                    if exp is not None:
+                        expiries[key] = exp
+                    continue
+            stale[key] = value
+
+        fresh = wrap_env_file(
+            stale, self.signing_key, self.rules, self.expires_in_days, cache, self.compress
+        )
+        self._track(stale, fresh, wrapped, expiries)
+
+        # Keep the .env ordering regardless of which tokens were rebuilt
+        ordered = {key: wrapped[key] for key in self.env_vars}
+        return EnvSnapshot(ordered, expiries)
+
+    @staticmethod
+    def _track(
+        plain: Dict[str, str],
+        fresh: Dict[str, str],
+        wrapped: Dict[str, str],
+        expiries: Dict[str, float],
+    ) -> None:
+        """Record freshly wrapped values and the expiry of each token issued."""
+        for key, token in fresh.items():
+            wrapped[key] = token
+            # Only tokens issued here can be re-wrapped; pre-wrapped input
+            # values and plaintext pass-throughs are served as they are
+            if token != plain[key] and is_wrapped_token(token):
+                exp = get_token_expiry(token)
+                if exp is not None:
+                    expiries[key] = exp
+
+    def refresh(self) -> EnvSnapshot:
+        """Re-wrap tokens nearing expiry and swap in the new snapshot."""
+        with self._lock:
+            return self._publish(self.build_snapshot(self.snapshot))
+
+    def reload(self, env_vars: Dict[str, str]) -> EnvSnapshot:
+        """Replace the plaintext index, re-wrapping only added and changed values."""
+        with self._lock:
+            # Warm a lazy state first so no memoized token outlives its value
+            current = self.snapshot
+            modified = [key for key, value in env_vars.items() if self.env_vars.get(key) != value]
+            self.env_vars = env_vars
+            return self._publish(self.build_snapshot(current, modified))
+
+    def _publish(self, snapshot: EnvSnapshot) -> EnvSnapshot:
+        """Swap in a snapshot under the next version, unless nothing changed."""
+        current = self.snapshot
+        if snapshot.wrapped == current.wrapped:
+            if snapshot.expiries == current.expiries:
+                return current
+            # Same tokens, updated bookkeeping: not a change clients can see
+            snapshot.version = current.version
+            self.snapshot = snapshot
+            return snapshot
+        snapshot.version = current.version + 1
+        with self._changed:
+            self.snapshot = snapshot
+            self._history.append(snapshot)
+            self._changed.notify_all()
+        return snapshot
+
+    def delta(self, since: int) -> Dict[str, Any]:
+        """
+        Describe what changed between version ``since`` and the current one.
+
+        Returns:
+            A dict with ``version``, ``since``, ``added``, ``changed`` and
+            ``removed``. If ``since`` is no longer (or not yet) known, the
+            result has ``reset: true`` and every key listed under ``added``;
+            clients must then discard what they had.
+        """
+        current = self.snapshot
+        base = next((s for s in self._history if s.version == since), None)
+        if base is None:
+            return {
+                "version": current.version,
+                "since": since,
+                "reset": True,
+                "added": dict(current.wrapped),
+                "changed": {},
+                "removed": [],
+            }
+        delta = diff_snapshots(base.wrapped, current.wrapped)
+        delta.update(version=current.version, since=since, reset=False)
+        return delta
+
+    def wait_for_version(self, after: int, timeout: float) -> int:
+        """Block until the version exceeds ``after``, the timeout passes or the state closes."""
+        with self._changed:
+            self._changed.wait_for(
+                lambda: self.closed or self.snapshot.version > after, timeout
+            )
+            return self.snapshot.version
+
+    def close(self) -> None:
+        """Wake and end all event streams."""
+        with self._changed:
+            self.closed = True
+            self._changed.notify_all()
+
+    def seconds_until_refresh(self) -> Optional[float]:
+        """Seconds until the earliest token enters the refresh window (None if never)."""
+        if self._snapshot is None:
+            # Still warming up: check again later rather than forcing it
+            return 0.0
+        earliest = self._snapshot.earliest_expiry
+        if earliest is None:
+            return None
+        return earliest - self.refresh_margin - time.time()
+
+
+class SnapshotRefresher(threading.Thread):
+    """
+    Daemon thread that re-wraps tokens in the background before they expire.
+
+    Requests keep reading the current snapshot while a new one is built, so
+    refreshing never blocks the server.
+    """
+
+    def __init__(self, state: EnvServerState, min_interval: float = 60.0):
+        super().__init__(name="ghost-env-refresher", daemon=True)
+        self.state = state
+        self.min_interval = min_interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.is_set():
+            delay = self.state.seconds_until_refresh()
+            if delay is None:
+                delay = threading.TIMEOUT_MAX
+            # Never spin, even if tokens live shorter than the refresh margin
+            delay = min(max(delay, self.min_interval), threading.TIMEOUT_MAX)
+            if self._stopped.wait(delay):
+                break
+            if self.state.warmed:
+                try:
+                    self.state.refresh()
+                except Exception:
+                    # Keep serving the current tokens and retry next round
+                    logger.exception("Refreshing wrapped tokens failed")
+
+    def stop(self) -> None:
+        """Ask the thread to exit at its next wake-up."""
+        self._stopped.set()
+
+
+class SnapshotWarmer(threading.Thread):
+    """
+    Daemon thread that wraps a lazy state's keys in the background.
+
+    Keys are wrapped a chunk at a time, so on-demand requests for single
+    keys only ever wait for one chunk. The first snapshot is published once
+    every key is wrapped.
+    """
+
+    def __init__(self, state: EnvServerState, chunk_size: int = 32):
+        super().__init__(name="ghost-env-warmer", daemon=True)
+        self.state = state
+        self.chunk_size = chunk_size
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        keys = list(self.state.env_vars)
+        for i in range(0, len(keys), self.chunk_size):
+            if self._stopped.is_set() or self.state.warmed:
+                return
+            self.state.wrap_keys(keys[i:i + self.chunk_size])
+        if not self._stopped.is_set():
+            self.state.warm()
+
+    def stop(self) -> None:
+        """Ask the thread to exit before its next chunk."""
+        self._stopped.set()
+
+
+def parse_keys(values: List[str]) -> List[str]:
+    """Split repeated and comma-separated ``keys`` query values, dropping blanks."""
+    return [key for value in values for key in value.split(",") if key]
+
+
+class EnvFileWatcher(threading.Thread):
+    """
+    Daemon thread that reloads the server state when the .env file changes.
+
+    With a profile, every layer is watched, including layers that do not
+    exist yet. Only the changed layer is parsed again, and only keys whose
+    merged value changed are re-wrapped.
+
+    A change is only acted on once the layers' stamps have stayed the same
+    for two consecutive checks, so a file caught truncated in the middle of
+    a write is never published.
+    """
+
+    def __init__(
+        self,
+        state: EnvServerState,
+        env_path: str,
+        interval: float = 2.0,
+        profile: Optional[str] = None,
+    ):
+        super().__init__(name="ghost-env-watcher", daemon=True)
+        self.state = state
+        self.env_path = env_path
+        self.profile = profile
+        self.paths = env_layer_paths(env_path, profile)
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._stamp = self._stat()
+        self._pending: Optional[Tuple[Optional[Tuple[int, int, int]], ...]] = None
+
+    def _stat(self) -> Tuple[Optional[Tuple[int, int, int]], ...]:
+        stamps = []
+        for path in self.paths:
+            try:
+                st = os.stat(path)
+                stamps.append((st.st_mtime_ns, st.st_size, st.st_ino))
+            except OSError:
+                stamps.append(None)
+        return tuple(stamps)
+
+    def check(self) -> bool:
+        """
+        Reload once if any layer changed and has settled since the last check.
+
+        A missing base file is treated as a transient state (``rm && cp``,
+        a checkout in progress) rather than as an empty environment, so the
+        current variables stay published until it reappears.
+        """
+        stamp = self._stat()
+        if stamp == self._stamp or stamp[0] is None:
+            self._pending = None
+            return False
+        if stamp != self._pending:
+            # Still being written, or changed again since the last check
+            self._pending = stamp
+            return False
+        self._pending = None
+        # Recorded first, so a file that fails to read is reported once per change
+        self._stamp = stamp
+        self.state.reload(read_env_file(self.env_path, self.profile))
+        return True
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Reloading %s failed; still serving the previous version", self.env_path)
+
+    def stop(self) -> None:
+        """Ask the thread to exit at its next wake-up."""
+        self._stopped.set()
+
+
+def make_handler(
+    state: EnvServerState,
+    verbose: bool = False,
+    keep_alive: bool = False,
+    event_heartbeat: float = 15.0,
+) -> type:
+    """
+    Build the request handler class bound to a server state.
+
+    Args:
+        state: The shared server state
+        verbose: Log each request to stderr
+        keep_alive: Speak HTTP/1.1 so clients can reuse connections, and
+            allow long-lived ``/events`` streams. Only safe with a threaded
+            server, where an open connection does not hold up everyone else.
+        event_heartbeat: Seconds between keep-alive comments on idle streams
+
+    Returns:
+        A BaseHTTPRequestHandler subclass
+    """
+
+    class EnvHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1" if keep_alive else "HTTP/1.0"
+        # Headers and body go out in separate writes; without TCP_NODELAY a
+        # reused connection stalls on delayed ACKs for every response
+        disable_nagle_algorithm = keep_alive
+
+        def do_GET(self):
+            """Handle GET requests for environment variables and change feeds."""
+            url = urllib.parse.urlsplit(self.path)
+            query = urllib.parse.parse_qs(url.query)
+
+            if url.path.startswith("/env/"):
+                key = urllib.parse.unquote(url.path[len("/env/"):])
+                wrapped = state.wrap_keys([key])
+                if not wrapped:
+                    self._send_json(404, {"error": f"Unknown key: {key}"})
+                    return
+                self._send_json(200, wrapped, cors=True)
+            elif url.path == "/env" or url.path == "/env.json":
+                if "keys" in query:
+                    # Projection: only the requested keys are wrapped, even
+                    # while a lazy server is still warming up
+                    self._send_json(200, state.wrap_keys(parse_keys(query["keys"])), cors=True)
+                    return
+                if "since" in query:
+                    try:
+                        since = int(query["since"][0])
+                    except ValueError:
+                        self._send_json(400, {"error": "since must be an integer version"})
+                        return
+                    self._send_json(200, state.delta(since), cors=True)
+                    return
+
+                snapshot = state.snapshot
+                etag = f'"v{snapshot.version}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("Access-Control-Allow-Origin", "*")
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                body = snapshot.body
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Access-Control-Allow-Origin", "*")
+                self.send_header("ETag", etag)
+                self.send_header("X-Env-Version", str(snapshot.version))
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            elif url.path == "/events":
+                self._stream_events(query)
+            elif url.path == "/health":
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain")
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"OK")
+            else:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+        def _stream_events(self, query: Dict[str, List[str]]) -> None:
+            """Push deltas as Server-Sent Events until the client goes away."""
+            if not keep_alive:
+                # A held-open stream would stall every other request
+                self._send_json(501, {"error": "Event streams require 'ghost-env serve --threaded'"})
+                return
+
+            since_value = self.headers.get("Last-Event-ID") or (query.get("since") or [None])[0]
+            try:
+                since = int(since_value) if since_value is not None else None
+            except ValueError:
+                self._send_json(400, {"error": "since must be an integer version"})
+                return
+
+            self.close_connection = True
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("Connection", "close")
+            self.end_headers()
+
+            try:
+                # New subscribers start from a full snapshot (a reset delta)
+                last = since if since is not None else 0
+                while not state.closed:
+                    if state.snapshot.version != last:
+                        delta = state.delta(last)
+                        last = delta["version"]
+                        self.wfile.write(
+                            f"id: {last}\nevent: delta\ndata: {json.dumps(delta)}\n\n".encode("utf-8")
+                        )
+                    elif state.wait_for_version(last, event_heartbeat) == last and not state.closed:
+                        # Comment line keeps proxies open and detects gone clients
+                        self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def do_POST(self):
+            """Handle POST requests to unwrap tokens."""
+            if self.path == "/unwrap":
+                content_length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(content_length)
+
+                try:
+                    data = json.loads(body.decode("utf-8"))
+                    token = data.get("token", "")
+
+                    if is_wrapped_token(token):
+                        value = unwrap_value(token, state.signing_key)
+                        if value is not None:
+                            response = {"value": value}
+                        else:
+                            response = {"error": "Invalid or expired token"}
+                    else:
+                        response = {"error": "Not a wrapped token"}
+
+                    self._send_json(200, response)
+                except Exception as e:
+                    self._send_json(400, {"error": str(e)})
+            else:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+        def _send_json(self, status: int, payload: Dict[str, Any], cors: bool = False) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            if cors:
+                self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            """Suppress default logging."""
+            if verbose:
+                super().log_message(format, *args)
+
+    return EnvHandler
+
+
+def create_server(
+    state: EnvServerState,
+    port: int,
+    verbose: bool = False,
+    threaded: bool = False,
+) -> HTTPServer:
+    """
+    Create (but do not start) the bridge HTTP server.
+
+    Args:
+        state: The shared server state
+        port: Port to bind on all interfaces (0 picks a free port)
+        verbose: Log each request to stderr
+        threaded: Handle each connection in its own thread with HTTP/1.1
+            keep-alive, instead of one request at a time
+
+    Returns:
+        The bound HTTP server
+    """
+    if threaded:
+        httpd = ThreadingHTTPServer(("", port), make_handler(state, verbose, keep_alive=True))
+        httpd.daemon_threads = True
+        return httpd
+    return HTTPServer(("", port), make_handler(state, verbose))
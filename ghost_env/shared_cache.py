@@ -0,0 +1,264 @@
+"""Cross-process cache of unwrapped ghost.env values.
+
+Pre-fork servers (gunicorn, uwsgi) often have every worker unwrap the same
+ghost.env at boot. With :func:`unwrap_env_file`, the first worker verifies
+the tokens once and publishes the results to a memory-mapped file. The
+other workers attach to that file read-only and decode values on access,
+so the values stay in shared pages instead of one copy per worker::
+
+    from ghost_env import ensure_signing_key
+    from ghost_env.shared_cache import unwrap_env_file
+
+    os.environ.update(unwrap_env_file("ghost.env", ensure_signing_key()))
+
+Cache files hold plaintext. They live in a 0700 per-user directory
+(``/dev/shm`` when available, so they never reach disk) and are created
+0600. Each file is named after the signing key id and a digest of the
+ghost.env contents, so editing the file or rotating the key switches to a
+new entry. An entry is never used past the earliest expiry of the tokens
+it was built from.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Mapping, Optional, Tuple
+
+from ghost_env.config import get_config_dir
+from ghost_env.env_reader import parse_env_line, unwrap_env_vars
+from ghost_env.jwt_wrapper import get_token_expiry, is_wrapped_token
+from ghost_env.profiling import traced
+from ghost_env.token_cache import signing_key_id
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+_MAGIC = b"GEU1"
+# magic, entry count, expires_at (Unix time, inf if no token expires)
+_HEADER = struct.Struct("<4sId")
+# key length, value length
+_ENTRY = struct.Struct("<II")
+
+
+def get_shared_cache_dir() -> Path:
+    """
+    Get the per-user directory for shared cache files, creating it 0700.
+
+    Raises:
+        PermissionError: If the directory exists but is not a private
+            directory owned by the current user
+    """
+    shm = Path("/dev/shm")
+    if hasattr(os, "getuid") and shm.is_dir() and os.access(shm, os.W_OK):
+        directory = shm / f"ghost_env-{os.getuid()}"
+    else:
+        directory = get_config_dir() / "shared"
+
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+
+    # /dev/shm is world-writable: never trust a directory someone else made
+    st = os.lstat(directory)
+    if hasattr(os, "getuid"):
+        if (
+            not os.path.isdir(directory)
+            or os.path.islink(directory)
+            or st.st_uid != os.getuid()
+            or st.st_mode & 0o077
+        ):
+            raise PermissionError(f"Refusing to use shared cache directory {directory}")
+    return directory
+
+
+class SharedEnv(Mapping):
+    """
+    Read-only mapping of unwrapped variables backed by a cache file.
+
+    Only the key index is held per process; values are decoded from the
+    shared mapping on each access.
+    """
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, self.expires_at = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC:
+            self._mmap.close()
+            raise ValueError(f"Not a ghost_env shared cache file: {path}")
+
+        self._index: Dict[str, Tuple[int, int]] = {}
+        offset = _HEADER.size
+        for _ in range(count):
+            key_len, value_len = _ENTRY.unpack_from(self._mmap, offset)
+            offset += _ENTRY.size
+            key = self._mmap[offset:offset + key_len].decode("utf-8")
+            offset += key_len
+            self._index[key] = (offset, value_len)
+            offset += value_len
+
+    def __getitem__(self, key: str) -> str:
+        offset, length = self._index[key]
+        return self._mmap[offset:offset + length].decode("utf-8", "surrogatepass")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def expired(self) -> bool:
+        """Whether a token this entry was built from has expired since."""
+        return time.time() >= self.expires_at
+
+    def close(self) -> None:
+        """Unmap the cache file."""
+        self._mmap.close()
+
+
+def _pack(values: Dict[str, str], expires_at: float) -> bytes:
+    parts = [_HEADER.pack(_MAGIC, len(values), expires_at)]
+    for key, value in values.items():
+        key_bytes = key.encode("utf-8")
+        value_bytes = value.encode("utf-8", "surrogatepass")
+        parts.append(_ENTRY.pack(len(key_bytes), len(value_bytes)))
+        parts.append(key_bytes)
+        parts.append(value_bytes)
+    return b"".join(parts)
+
+
+def _publish(path: Path, data: bytes) -> None:
+    """Atomically place a 0600 cache file, so readers never see a partial one."""
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=".unwrapped.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _attach(path: Path) -> Optional[SharedEnv]:
+    """Attach to a published entry, or None if it is missing, corrupt or expired."""
+    try:
+        shared = SharedEnv(path)
+    except (OSError, ValueError, struct.error):
+        return None
+    if shared.expired:
+        shared.close()
+        return None
+    return shared
+
+
+def _prune(directory: Path, path_tag: str, keep: Path) -> None:
+    """Remove earlier versions (and their lock files) of the same source file."""
+    for old in directory.glob(f"{path_tag}-*"):
+        if old.name not in (keep.name, keep.name + ".lock"):
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+
+@traced("ghost_env.unwrap_env_file", lambda env_path, *args, **kwargs: {"path": str(env_path)})
+def unwrap_env_file(
+    env_path: str,
+    signing_key: str,
+    directory: Optional[Path] = None,
+) -> Mapping[str, str]:
+    """
+    Read and unwrap a ghost.env file, sharing the result across processes.
+
+    The first caller for a given file version verifies the tokens and
+    publishes the results; concurrent callers wait for it instead of
+    verifying too, then everyone attaches to the same file read-only.
+
+    Args:
+        env_path: Path to the ghost.env file
+        signing_key: The secret key used to verify the JWTs
+        directory: Cache directory (default: :func:`get_shared_cache_dir`)
+
+    Returns:
+        Read-only mapping of unwrapped values, like
+        :func:`ghost_env.env_reader.unwrap_env_vars`. Empty if the file
+        does not exist.
+    """
+    try:
+        with open(env_path, "rb") as f:
+            content = f.read()
+    except FileNotFoundError:
+        return {}
+
+    if directory is None:
+        directory = get_shared_cache_dir()
+    path_tag = hashlib.sha256(os.path.abspath(env_path).encode("utf-8")).hexdigest()[:16]
+    version = hashlib.sha256(
+        signing_key_id(signing_key).encode("ascii") + b"\0" + content
+    ).hexdigest()[:32]
+    path = Path(directory) / f"{path_tag}-{version}.bin"
+
+    shared = _attach(path)
+    if shared is not None:
+        return shared
+
+    lock_fd = os.open(str(path) + ".lock", os.O_CREAT | os.O_RDWR, 0o600)
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        # Another process may have published while we waited for the lock
+        shared = _attach(path)
+        if shared is not None:
+            return shared
+
+        env_vars: Dict[str, str] = {}
+        for line in content.decode("utf-8").splitlines():
+            parsed = parse_env_line(line)
+            if parsed is not None:
+                env_vars[parsed[0]] = parsed[1]
+
+        unwrapped = unwrap_env_vars(env_vars, signing_key)
+        expiries = [
+            get_token_expiry(token)
+            for key, token in env_vars.items()
+            if is_wrapped_token(token) and unwrapped[key] != token
+        ]
+        expires_at = min((exp for exp in expiries if exp is not None), default=float("inf"))
+
+        _publish(path, _pack(unwrapped, expires_at))
+        _prune(Path(directory), path_tag, path)
+    finally:
+        os.close(lock_fd)
+
+    shared = _attach(path)
+    if shared is None:
+        # Everything in it expired already; serve this process's own result
+        return unwrapped
+    return shared
+
+
+def clear_shared_cache(directory: Optional[Path] = None) -> None:
+    """Delete every shared cache file (e.g. after rotating the signing key)."""
+    if directory is None:
+        try:
+            directory = get_shared_cache_dir()
+        except PermissionError:
+            return
+    for path in Path(directory).iterdir():
+        if path.name.endswith((".bin", ".lock")):
+            try:
+                path.unlink()
+            except OSError:
+                pass
@@ -0,0 +1,172 @@
+"""Persistent cache of issued tokens, keyed by a keyed hash of their values.
+
+Repeat ``convert``, ``wrap`` and ``serve`` runs over an unchanged .env file
+reuse the tokens issued last time instead of re-signing every value. That
+makes them nearly free and keeps ``ghost.env`` diffs quiet.
+
+Entries are addressed by ``HMAC-SHA256(signing_key, key_id | lifetime | value)``,
+but each entry stores the full token, and a token's payload is only
+base64-encoded, not encrypted. The cache file therefore holds every cached
+secret in recoverable form and is exactly as sensitive as the signing key:
+it is written 0600 next to the key, entries not reused within ``max_idle``
+seconds are dropped, and rotating the key deletes the file. A cache written
+under a different key is discarded on load.
+"""
+
+import hashlib
+import hmac
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ghost_env.config import get_token_cache_path, write_private_file
+from ghost_env.jwt_wrapper import COMPRESS_THRESHOLD, get_token_expiry, wrap_value
+
+CACHE_FORMAT_VERSION = 1
+
+
+def signing_key_id(signing_key: str) -> str:
+    """Short public identifier of a signing key (not reversible)."""
+    return hashlib.sha256(signing_key.encode("utf-8")).hexdigest()[:16]
+
+
+def _valid_entry(entry: Any) -> bool:
+    """Check an entry has the ``[token, exp, last_used]`` shape."""
+    return (
+        isinstance(entry, list)
+        and len(entry) == 3
+        and isinstance(entry[0], str)
+        and all(isinstance(n, (int, float)) and not isinstance(n, bool) for n in entry[1:])
+    )
+
+
+class TokenCache:
+    """
+    Content-addressed store of still-valid tokens for one signing key.
+
+    A cached token is reused while at least ``reuse_fraction`` of its
+    lifetime remains, so reused tokens are never much closer to expiry than
+    freshly issued ones. On :meth:`save`, expired entries and entries not
+    used for ``max_idle`` seconds are dropped, and the least recently used
+    ones are evicted above ``max_entries``. The short idle window keeps
+    values that left every .env file from lingering until token expiry.
+
+    Use as a context manager to save on exit::
+
+        with TokenCache.open(signing_key) as cache:
+            wrapped = wrap_env_file(env_vars, signing_key, cache=cache)
+    """
+
+    def __init__(
+        self,
+        signing_key: str,
+        path: Optional[Path] = None,
+        max_entries: int = 10000,
+        reuse_fraction: float = 0.5,
+        max_idle: float = 7 * 86400.0,
+    ):
+        self.signing_key = signing_key
+        self.key_id = signing_key_id(signing_key)
+        self.path = Path(path) if path is not None else get_token_cache_path()
+        self.max_entries = max_entries
+        self.reuse_fraction = reuse_fraction
+        self.max_idle = max_idle
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        # digest -> [token, exp, last_used]
+        self._entries: Dict[str, List] = {}
+
+    @classmethod
+    def open(cls, signing_key: str, path: Optional[Path] = None, **kwargs) -> "TokenCache":
+        """Create a cache and load its entries from disk."""
+        cache = cls(signing_key, path, **kwargs)
+        cache.load()
+        return cache
+
+    def load(self) -> None:
+        """Load entries from disk, ignoring missing, corrupt or foreign-key files."""
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict):
+            return
+        if data.get("format") != CACHE_FORMAT_VERSION or data.get("key_id") != self.key_id:
+            return
+        entries = data.get("entries")
+        if not isinstance(entries, dict):
+            return
+        self._entries = {
+            digest: entry for digest, entry in entries.items() if _valid_entry(entry)
+        }
+
+    def save(self) -> None:
+        """Evict expired and excess entries and write the cache if it changed."""
+        if not self._dirty:
+            return
+        now = time.time()
+        idle_cutoff = now - self.max_idle
+        entries = {
+            d: e for d, e in self._entries.items() if e[1] > now and e[2] > idle_cutoff
+        }
+        if len(entries) > self.max_entries:
+            newest = sorted(entries.items(), key=lambda item: item[1][2], reverse=True)
+            entries = dict(newest[: self.max_entries])
+        self._entries = entries
+
+        payload = {"format": CACHE_FORMAT_VERSION, "key_id": self.key_id, "entries": entries}
+        write_private_file(self.path, json.dumps(payload, separators=(",", ":")))
+        self._dirty = False
+
+    def __enter__(self) -> "TokenCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.save()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _digest(self, value: str, expires_in_days: int, compress: bool = False) -> str:
+        # "365z" can never be a plain lifetime, so the two forms cannot collide
+        lifetime = f"{expires_in_days}z" if compress else str(expires_in_days)
+        message = f"{self.key_id}\0{lifetime}\0{value}".encode("utf-8")
+        return hmac.new(self.signing_key.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+    def get(self, value: str, expires_in_days: int = 365, compress: bool = False) -> Optional[str]:
+        """Return a reusable token for value, or None."""
+        entry = self._entries.get(self._digest(value, expires_in_days, compress))
+        if entry is None:
+            return None
+        now = time.time()
+        if entry[1] - now < expires_in_days * 86400 * self.reuse_fraction:
+            return None
+        entry[2] = now
+        self._dirty = True
+        return entry[0]
+
+    def put(self, value: str, token: str, expires_in_days: int = 365, compress: bool = False) -> None:
+        """Remember a token issued for value."""
+        exp = get_token_expiry(token)
+        if exp is None:
+            return
+        self._entries[self._digest(value, expires_in_days, compress)] = [token, exp, time.time()]
+        self._dirty = True
+
+    def wrap(self, value: str, expires_in_days: int = 365, compress: bool = False) -> str:
+        """Return a cached token for value, wrapping (and caching) it on a miss."""
+        token = self.get(value, expires_in_days, compress)
+        if token is not None:
+            self.hits += 1
+            return token
+        self.misses += 1
+        token = wrap_value(
+            value,
+            self.signing_key,
+            expires_in_days,
+            COMPRESS_THRESHOLD if compress else None,
+        )
+        self.put(value, token, expires_in_days, compress)
+        return token
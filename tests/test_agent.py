@@ -0,0 +1,208 @@
+"""Tests for the resident ghost_env agent."""
+
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+from ghost_env.config import ensure_signing_key, rotate_signing_key
+from ghost_env.jwt_wrapper import unwrap_value, wrap_value
+from ghost_env.rules import WrapRules
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="requires unix sockets")
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    """Run an agent on a short temporary socket path and yield its path."""
+    from ghost_env.agent import AGENT_SOCKET_ENV, AgentServer
+    
+    # Unix socket paths are length-limited, so avoid pytest's long tmp_path
+    tmpdir = tempfile.mkdtemp(prefix="ghe")
+    monkeypatch.setenv("XDG_CONFIG_HOME", tmpdir)
+    socket_path = Path(tmpdir) / "agent.sock"
+    monkeypatch.setenv(AGENT_SOCKET_ENV, str(socket_path))
+    
+    server = AgentServer(socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    
+    yield socket_path
+    
+    server.shutdown()
+    server.server_close()
+    shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def test_socket_permissions(agent):
+    """Test that only the owner can access the socket."""
+    assert stat.S_IMODE(os.stat(agent).st_mode) == 0o600
+
+
+def test_no_agent_returns_none(monkeypatch, tmp_path):
+    """Test that connecting without a running agent returns None."""
+    from ghost_env.agent import AGENT_SOCKET_ENV, connect_agent
+    
+    monkeypatch.setenv(AGENT_SOCKET_ENV, str(tmp_path / "missing.sock"))
+    assert connect_agent() is None
+
+
+def test_wrap_and_unwrap(agent):
+    """Test wrapping and unwrapping through the agent."""
+    from ghost_env.agent import connect_agent
+    
+    client = connect_agent()
+    try:
+        wrapped = client.wrap({"API_KEY": "secret", "PORT": "8080"}, WrapRules(heuristics=True))
+        assert wrapped["PORT"] == "8080"
+        assert unwrap_value(wrapped["API_KEY"], ensure_signing_key()) == "secret"
+        
+        assert client.unwrap([wrapped["API_KEY"], "plain", wrap_value("x", "k" * 32)]) == [
+            "secret",
+            None,
+            None,
+        ]
+    finally:
+        client.close()
+
+
+def test_agent_follows_key_rotation(agent):
+    """Test that the agent picks up a rotated key without restarting."""
+    from ghost_env.agent import connect_agent
+    
+    client = connect_agent()
+    try:
+        client.wrap({"A": "1"})
+        new_key = rotate_signing_key()
+        wrapped = client.wrap({"A": "1"})
+        assert unwrap_value(wrapped["A"], new_key) == "1"
+    finally:
+        client.close()
+
+
+def test_convert_via_agent(agent, tmp_path):
+    """Test path-based conversion and error propagation through the agent."""
+    from ghost_env.agent import connect_agent
+    
+    env_path = tmp_path / ".env"
+    env_path.write_text("API_KEY=secret\n", encoding="utf-8")
+    output_path = tmp_path / "ghost.env"
+    
+    client = connect_agent()
+    try:
+        assert client.convert(str(env_path), str(output_path)) == 1
+        token = output_path.read_text(encoding="utf-8").strip().split("=", 1)[1]
+        assert unwrap_value(token, ensure_signing_key()) == "secret"
+        
+        with pytest.raises(FileNotFoundError):
+            client.convert(str(tmp_path / "missing.env"), str(output_path))
+    finally:
+        client.close()
+
+
+def test_refuses_to_replace_live_agent(agent):
+    """Test that a second agent cannot take over a live socket."""
+    from ghost_env.agent import AgentError, AgentServer
+    
+    with pytest.raises(AgentError):
+        AgentServer(agent)
+
+
+def test_cli_delegates_to_agent(agent, monkeypatch, capsys):
+    """Test that CLI unwrap resolves tokens through the agent."""
+    from ghost_env import cli
+    
+    token = wrap_value("secret", ensure_signing_key())
+    # The CLI must not need the key itself when the agent answers
+    monkeypatch.setattr(cli, "ensure_signing_key", lambda: pytest.fail("loaded key locally"))
+    monkeypatch.setattr("sys.argv", ["ghost-env", "unwrap", token])
+    
+    assert cli.main() == 0
+    assert capsys.readouterr().out == "secret\n"
+
+
+def test_cli_rejects_non_tokens_like_in_process(agent, monkeypatch, capsys):
+    """Test that a non-token argument fails the same with and without the agent."""
+    from ghost_env import cli
+    
+    results = []
+    for argv in (["unwrap", "not-a-token"], ["--no-agent", "unwrap", "not-a-token"]):
+        monkeypatch.setattr("sys.argv", ["ghost-env", *argv])
+        code = cli.main()
+        results.append((code, capsys.readouterr()))
+    
+    for code, captured in results:
+        assert code == 1
+        assert captured.out == ""
+        assert "Invalid or expired token" in captured.err
+
+
+def test_concurrent_cached_wraps(agent):
+    """Test that clients sharing the agent's token cache do not corrupt it."""
+    from ghost_env.agent import connect_agent
+    from ghost_env.token_cache import TokenCache
+    
+    errors = []
+    
+    def worker(n):
+        client = connect_agent()
+        try:
+            for i in range(10):
+                values = {f"K{n}_{i}_{j}": f"value-{n}-{i}-{j}" for j in range(20)}
+                client.wrap(values, use_cache=True)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            client.close()
+    
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert errors == []
+    assert len(TokenCache.open(ensure_signing_key())) == 4 * 10 * 20
+
+
+def test_cli_does_not_redo_failed_requests(monkeypatch, capsys, tmp_path):
+    """Test that a request the agent received is not repeated in-process."""
+    from ghost_env.agent import AGENT_SOCKET_ENV
+    from ghost_env.cli import main
+    
+    tmpdir = tempfile.mkdtemp(prefix="ghe")
+    monkeypatch.setenv("XDG_CONFIG_HOME", tmpdir)
+    socket_path = os.path.join(tmpdir, "agent.sock")
+    monkeypatch.setenv(AGENT_SOCKET_ENV, socket_path)
+    
+    # An "agent" that reads one request and hangs up without answering
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(1)
+    
+    def serve_once():
+        conn, _ = listener.accept()
+        conn.makefile("rb").readline()
+        conn.close()
+    
+    thread = threading.Thread(target=serve_once, daemon=True)
+    thread.start()
+    
+    env_path = tmp_path / ".env"
+    env_path.write_text("API_KEY=secret\n", encoding="utf-8")
+    out_path = tmp_path / "ghost.env"
+    monkeypatch.setattr("sys.argv", ["ghost-env", "convert", str(env_path), str(out_path)])
+    try:
+        assert main() == 1
+    finally:
+        thread.join(5)
+        listener.close()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    
+    assert "agent request failed" in capsys.readouterr().err
+    assert not out_path.exists()
@@ -0,0 +1,97 @@
+"""Tests for the asyncio API."""
+
+import asyncio
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from ghost_env import aio
+from ghost_env.jwt_wrapper import generate_signing_key, is_wrapped_token, unwrap_value
+from ghost_env.rules import WrapRules
+
+
+def test_read_env_file():
+    """Test reading a .env file asynchronously."""
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".env", delete=False) as f:
+        f.write("API_KEY=secret123\n")
+        env_path = f.name
+    
+    try:
+        assert asyncio.run(aio.read_env_file(env_path)) == {"API_KEY": "secret123"}
+    finally:
+        Path(env_path).unlink()
+
+
+def test_wrap_and_unwrap_in_chunks():
+    """Test chunked wrapping and unwrapping preserve values and order."""
+    key = generate_signing_key()
+    env_vars = {f"KEY_{i}": f"value-{i}" for i in range(25)}
+    
+    async def round_trip():
+        wrapped = await aio.wrap_env_file(env_vars, key, chunk_size=4, max_concurrency=2)
+        unwrapped = await aio.unwrap_env_vars(wrapped, key, chunk_size=4, max_concurrency=2)
+        return wrapped, unwrapped
+    
+    wrapped, unwrapped = asyncio.run(round_trip())
+    
+    assert list(wrapped) == list(env_vars)
+    assert all(is_wrapped_token(value) for value in wrapped.values())
+    assert unwrapped == env_vars
+
+
+def test_wrap_with_rules():
+    """Test that rules apply to the async wrapper."""
+    key = generate_signing_key()
+    wrapped = asyncio.run(aio.wrap_env_file({"API_KEY": "s", "PORT": "80"}, key, WrapRules(heuristics=True)))
+    
+    assert unwrap_value(wrapped["API_KEY"], key) == "s"
+    assert wrapped["PORT"] == "80"
+
+
+def test_event_loop_stays_responsive():
+    """Test that other coroutines run while values are being wrapped."""
+    key = generate_signing_key()
+    env_vars = {f"KEY_{i}": f"value-{i}" for i in range(200)}
+    
+    async def main():
+        ticks = 0
+        done = False
+        
+        async def ticker():
+            nonlocal ticks
+            while not done:
+                ticks += 1
+                await asyncio.sleep(0)
+        
+        task = asyncio.ensure_future(ticker())
+        await aio.wrap_env_file(env_vars, key, chunk_size=8)
+        done = True
+        await task
+        return ticks
+    
+    assert asyncio.run(main()) > 1
+
+
+def test_write_ghost_env_file():
+    """Test async conversion and missing-input errors."""
+    key = generate_signing_key()
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        env_path = Path(tmpdir) / ".env"
+        env_path.write_text("# c\nAPI_KEY=secret123\n", encoding="utf-8")
+        output_path = Path(tmpdir) / "ghost.env"
+        
+        count = asyncio.run(aio.write_ghost_env_file(str(env_path), str(output_path), key))
+        
+        assert count == 1
+        assert output_path.read_text(encoding="utf-8").startswith("# c\nAPI_KEY=gho_env.")
+        
+        with pytest.raises(FileNotFoundError):
+            asyncio.run(aio.write_ghost_env_file(str(Path(tmpdir) / "missing"), str(output_path), key))
+
+
+def test_invalid_limits():
+    """Test that non-positive chunk sizes are rejected."""
+    with pytest.raises(ValueError):
+        asyncio.run(aio.wrap_env_file({"A": "1"}, generate_signing_key(), chunk_size=0))
@@ -0,0 +1,43 @@
+"""Tests for the bridge server load-testing harness."""
+
+import pytest
+
+from ghost_env.bench import parse_mix, percentile, run_bench
+
+
+def test_parse_mix():
+    """Test parsing weighted request mixes."""
+    assert parse_mix("env=8,unwrap=1,health=1") == {"env": 8.0, "unwrap": 1.0, "health": 1.0}
+    assert parse_mix("env") == {"env": 1.0}
+    
+    with pytest.raises(ValueError):
+        parse_mix("bogus=1")
+    with pytest.raises(ValueError):
+        parse_mix("env=0")
+
+
+def test_percentile():
+    """Test nearest-rank percentiles."""
+    values = [float(i) for i in range(1, 101)]
+    
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) is None
+
+
+@pytest.mark.parametrize("threaded", [False, True])
+def test_run_bench(threaded):
+    """Test a short benchmark run against both server modes."""
+    results = run_bench(
+        clients=2,
+        duration=5.0,
+        requests_per_client=20,
+        variables=10,
+        threaded=threaded,
+    )
+    
+    assert results["config"]["server_mode"] == ("threaded" if threaded else "single")
+    assert results["overall"]["requests"] == 40
+    assert results["overall"]["errors"] == 0
+    assert results["overall"]["latency_ms"]["p50"] is not None
+    assert set(results["endpoints"]) == {"env", "unwrap", "health"}
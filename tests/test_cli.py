@@ -0,0 +1,147 @@
+"""Tests for the command-line interface."""
+
+import io
+import json
+
+import pytest
+
+from ghost_env.cli import main
+from ghost_env.config import ensure_signing_key
+from ghost_env.env_reader import read_env_file
+from ghost_env.jwt_wrapper import generate_signing_key, unwrap_value, wrap_value
+
+
+@pytest.fixture
+def signing_key(monkeypatch, tmp_path):
+    """Point the config directory at a temporary path and return its key."""
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    return ensure_signing_key()
+
+
+def run_cli(monkeypatch, *argv):
+    """Run the CLI with the given arguments and return its exit code."""
+    monkeypatch.setattr("sys.argv", ["ghost-env", *argv])
+    return main()
+
+
+def test_unwrap_single_token(monkeypatch, capsys, signing_key):
+    """Test unwrapping a single positional token."""
+    token = wrap_value("secret", signing_key)
+    
+    assert run_cli(monkeypatch, "unwrap", token) == 0
+    assert capsys.readouterr().out == "secret\n"
+
+
+def test_unwrap_file_export(monkeypatch, capsys, tmp_path, signing_key):
+    """Test batch unwrapping a ghost.env file as export statements."""
+    ghost_env = tmp_path / "ghost.env"
+    ghost_env.write_text(
+        "# comment\n"
+        f"API_KEY={wrap_value('it is secret', signing_key)}\n"
+        "PORT=8080\n",
+        encoding="utf-8",
+    )
+    
+    assert run_cli(monkeypatch, "unwrap", "--file", str(ghost_env), "--format", "export") == 0
+    assert capsys.readouterr().out.splitlines() == [
+        "export API_KEY='it is secret'",
+        "export PORT=8080",
+    ]
+
+
+def test_unwrap_stdin_json(monkeypatch, capsys, signing_key):
+    """Test batch unwrapping KEY=token lines from stdin as JSON."""
+    lines = f"A={wrap_value('1', signing_key)}\nB=\"{wrap_value('2', signing_key)}\"\n"
+    monkeypatch.setattr("sys.stdin", io.StringIO(lines))
+    
+    assert run_cli(monkeypatch, "unwrap", "--stdin", "--format", "json") == 0
+    assert json.loads(capsys.readouterr().out) == {"A": "1", "B": "2"}
+
+
+def test_unwrap_stdin_bare_tokens(monkeypatch, capsys, signing_key):
+    """Test batch unwrapping bare tokens, reporting invalid ones."""
+    lines = f"{wrap_value('one', signing_key)}\n{wrap_value('two', generate_signing_key())}\n"
+    monkeypatch.setattr("sys.stdin", io.StringIO(lines))
+    
+    assert run_cli(monkeypatch, "unwrap", "--stdin") == 1
+    captured = capsys.readouterr()
+    assert captured.out == "one\n"
+    assert "Invalid or expired token" in captured.err
+
+
+def test_unwrap_dotenv_quoting(monkeypatch, capsys, signing_key):
+    """Test that dotenv output quotes values that need it."""
+    monkeypatch.setattr("sys.stdin", io.StringIO(f"A={wrap_value('a b', signing_key)}\n"))
+    
+    assert run_cli(monkeypatch, "unwrap", "--stdin", "--format", "dotenv") == 0
+    assert capsys.readouterr().out == 'A="a b"\n'
+
+
+def test_profile_flag(monkeypatch, capsys, signing_key):
+    """Test that --profile prints a per-phase breakdown to stderr."""
+    token = wrap_value("secret", signing_key)
+    
+    assert run_cli(monkeypatch, "--profile", "--no-agent", "unwrap", token) == 0
+    captured = capsys.readouterr()
+    assert captured.out == "secret\n"
+    assert "ghost_env.unwrap_value" in captured.err
+    assert "ghost_env.ensure_signing_key" in captured.err
+
+
+def test_wrap_multiple_outputs(monkeypatch, capsys, tmp_path, signing_key):
+    """Test that all --output targets carry the same tokens."""
+    env_path = tmp_path / ".env"
+    env_path.write_text("API_KEY=secret\n", encoding="utf-8")
+    json_path = tmp_path / "env.json"
+    env_out = tmp_path / "ghost.env"
+    
+    assert run_cli(
+        monkeypatch, "--no-agent", "wrap", "--env-file", str(env_path),
+        "-o", f"json:{json_path}", "-o", f"env:{env_out}", "-o", "k8s:-",
+    ) == 0
+    
+    token = json.loads(json_path.read_text(encoding="utf-8"))["API_KEY"]
+    assert env_out.read_text(encoding="utf-8") == f"API_KEY={token}\n"
+    assert f'"API_KEY": "{token}"' in capsys.readouterr().out
+
+
+def test_wrap_rejects_bad_target(monkeypatch, capsys, tmp_path, signing_key):
+    """Test that malformed targets fail before anything is signed."""
+    assert run_cli(monkeypatch, "wrap", "-o", "yaml:out.yaml") == 1
+    assert "Unknown output format" in capsys.readouterr().err
+
+
+def test_convert_with_profile(monkeypatch, capsys, tmp_path, signing_key):
+    """Test that convert --env-profile writes the merged layers."""
+    env_path = tmp_path / ".env"
+    env_path.write_text("# base\nAPI_KEY=base\nDEBUG=0\n", encoding="utf-8")
+    (tmp_path / ".env.test").write_text("API_KEY=test\n", encoding="utf-8")
+    out_path = tmp_path / "ghost.env"
+    
+    assert run_cli(
+        monkeypatch, "--no-agent", "convert", str(env_path), str(out_path), "--env-profile", "test",
+    ) == 0
+    
+    env_vars = read_env_file(str(out_path))
+    assert list(env_vars) == ["API_KEY", "DEBUG"]
+    assert unwrap_value(env_vars["API_KEY"], signing_key) == "test"
+    assert "Converted 2" in capsys.readouterr().out
+
+
+
+def test_wrap_compress_flag(monkeypatch, capsys, tmp_path, signing_key):
+    """Test that --compress shrinks large values and plain wrap does not."""
+    env_path = tmp_path / ".env"
+    env_path.write_text("CERT=" + "MIIBabcdef0123456789" * 200 + "\n", encoding="utf-8")
+    
+    sizes = {}
+    for flags in ((), ("--compress",)):
+        assert run_cli(
+            monkeypatch, "--no-agent", "wrap", "--no-cache", "--env-file", str(env_path),
+            "--format", "json", *flags,
+        ) == 0
+        token = json.loads(capsys.readouterr().out)["CERT"]
+        assert unwrap_value(token, signing_key) == "MIIBabcdef0123456789" * 200
+        sizes[flags] = len(token)
+    
+    assert sizes[("--compress",)] < sizes[()] / 4
@@ -87,3 +87,82 @@ def test_rotate_signing_key(monkeypatch):
         loaded_key = load_signing_key()
         assert loaded_key == key2
 
+
+
+def test_concurrent_bootstrap_threads(monkeypatch):
+    """Test that racing threads on a fresh directory agree on one key."""
+    import threading
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        test_config_dir = Path(tmpdir) / "ghost_env"
+        test_config_dir.mkdir()
+        
+        monkeypatch.setattr(
+            "ghost_env.config.get_config_dir",
+            lambda: test_config_dir
+        )
+        
+        workers = 32
+        barrier = threading.Barrier(workers)
+        keys = []
+        
+        def bootstrap():
+            barrier.wait()
+            keys.append(ensure_signing_key())
+        
+        threads = [threading.Thread(target=bootstrap) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(keys) == workers
+        assert len(set(keys)) == 1
+        assert load_signing_key() == keys[0]
+        # No temporary files are left behind
+        assert [p.name for p in test_config_dir.iterdir()] == ["signing_key.txt"]
+
+
+def test_concurrent_bootstrap_processes(tmp_path):
+    """Test that racing processes on a fresh machine agree on one key."""
+    import os
+    import subprocess
+    import sys
+    
+    package_root = str(Path(__file__).resolve().parent.parent)
+    env = dict(os.environ, XDG_CONFIG_HOME=str(tmp_path), APPDATA=str(tmp_path), PYTHONPATH=package_root)
+    script = "from ghost_env.config import ensure_signing_key; print(ensure_signing_key())"
+    
+    processes = [
+        subprocess.Popen([sys.executable, "-c", script], env=env, stdout=subprocess.PIPE, text=True)
+        for _ in range(8)
+    ]
+    keys = {process.communicate()[0].strip() for process in processes}
+    
+    assert len(keys) == 1
+    assert (tmp_path / "ghost_env" / "signing_key.txt").read_text(encoding="utf-8") == keys.pop()
+
+
+def test_saved_key_is_private(monkeypatch):
+    """Test that saved keys are owner-only and replace the old key atomically."""
+    import os
+    import stat
+    
+    if os.name == "nt":
+        return
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        test_config_dir = Path(tmpdir) / "ghost_env"
+        test_config_dir.mkdir()
+        
+        monkeypatch.setattr(
+            "ghost_env.config.get_config_dir",
+            lambda: test_config_dir
+        )
+        
+        ensure_signing_key()
+        rotate_signing_key()
+        
+        key_path = get_signing_key_path()
+        assert stat.S_IMODE(os.stat(key_path).st_mode) == 0o600
+        assert [p.name for p in test_config_dir.iterdir()] == ["signing_key.txt"]
@@ -81,3 +81,89 @@ def test_write_ghost_env_preserves_formatting():
         if Path(output_path).exists():
             Path(output_path).unlink()
 
+
+
+def test_write_ghost_env_with_rules():
+    """Test that plaintext-safe lines are copied through unchanged."""
+    from ghost_env.rules import WrapRules
+    
+    signing_key = generate_signing_key()
+    
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".env", delete=False) as f:
+        f.write("API_KEY=secret123\n")
+        f.write('LOG_LEVEL="debug"\n')
+        env_path = f.name
+    
+    output_path = env_path.replace(".env", ".ghost.env")
+    
+    try:
+        wrapped_count = write_ghost_env_file(env_path, output_path, signing_key, WrapRules(heuristics=True))
+        
+        assert wrapped_count == 1
+        with open(output_path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        assert lines[0].startswith("API_KEY=gho_env.")
+        assert lines[1] == 'LOG_LEVEL="debug"\n'
+        
+    finally:
+        Path(env_path).unlink()
+        if Path(output_path).exists():
+            Path(output_path).unlink()
+
+
+def test_convert_env_stream():
+    """Test line-by-line conversion between text streams."""
+    import io
+    from ghost_env.env_reader import convert_env_stream
+    
+    signing_key = generate_signing_key()
+    infile = io.StringIO("# header\nAPI_KEY=secret123\n\nQUOTED='value'\nnot an assignment\n")
+    outfile = io.StringIO()
+    
+    wrapped_count = convert_env_stream(infile, outfile, signing_key, flush=True)
+    
+    assert wrapped_count == 2
+    lines = outfile.getvalue().splitlines()
+    assert lines[0] == "# header"
+    assert lines[2] == ""
+    assert lines[4] == "not an assignment"
+    assert unwrap_value(lines[1].split("=", 1)[1], signing_key) == "secret123"
+    assert lines[3].startswith("QUOTED='gho_env.")
+
+
+def test_write_ghost_env_stdin_stdout(monkeypatch, capsys):
+    """Test converting from stdin to stdout with '-' paths."""
+    import io
+    
+    signing_key = generate_signing_key()
+    monkeypatch.setattr("sys.stdin", io.StringIO("API_KEY=secret123\n"))
+    
+    wrapped_count = write_ghost_env_file("-", "-", signing_key)
+    
+    assert wrapped_count == 1
+    output = capsys.readouterr().out
+    assert unwrap_value(output.strip().split("=", 1)[1], signing_key) == "secret123"
+
+
+def test_write_ghost_env_in_place():
+    """Test that converting a file onto itself does not lose its content."""
+    signing_key = generate_signing_key()
+    
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".env", delete=False) as f:
+        f.write("API_KEY=secret123\n")
+        env_path = f.name
+    
+    try:
+        assert write_ghost_env_file(env_path, env_path, signing_key) == 1
+        ghost_vars = read_env_file(env_path)
+        assert unwrap_value(ghost_vars["API_KEY"], signing_key) == "secret123"
+    finally:
+        Path(env_path).unlink()
+
+
+def test_write_ghost_env_missing_input():
+    """Test that a missing input file is reported."""
+    import pytest
+    
+    with pytest.raises(FileNotFoundError):
+        write_ghost_env_file("/nonexistent/.env", "/tmp/unused.ghost.env", generate_signing_key())
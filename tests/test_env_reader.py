@@ -3,7 +3,10 @@
 import tempfile
 from pathlib import Path
 
-from ghost_env.env_reader import read_env_file, wrap_env_file, unwrap_env_vars
+import pytest
+
+from ghost_env import env_reader
+from ghost_env.env_reader import env_layer_paths, read_env_file, wrap_env_file, unwrap_env_vars
 
 
 def test_read_env_file():
@@ -82,3 +85,105 @@ def test_unwrap_mixed_vars():
     assert unwrapped["WRAPPED"] == "secret"
     assert unwrapped["PLAIN"] == "plain-value"
 
+
+
+def test_wrap_env_file_with_rules():
+    """Test that values rejected by the rules pass through unwrapped."""
+    from ghost_env.jwt_wrapper import generate_signing_key, is_wrapped_token
+    from ghost_env.rules import WrapRules
+    
+    key = generate_signing_key()
+    env_vars = {
+        "API_KEY": "secret123",
+        "PORT": "8080",
+    }
+    
+    wrapped = wrap_env_file(env_vars, key, WrapRules(heuristics=True))
+    
+    assert is_wrapped_token(wrapped["API_KEY"])
+    assert wrapped["PORT"] == "8080"
+    assert unwrap_env_vars(wrapped, key) == env_vars
+
+
+def test_parse_env_line():
+    """Test parsing single .env lines."""
+    from ghost_env.env_reader import parse_env_line
+    
+    assert parse_env_line("KEY=value\n") == ("KEY", "value", "")
+    assert parse_env_line(' KEY = "a=b" ') == ("KEY", "a=b", '"')
+    assert parse_env_line("KEY='x'") == ("KEY", "x", "'")
+    assert parse_env_line("# comment") is None
+    assert parse_env_line("   ") is None
+    assert parse_env_line("no assignment") is None
+
+
+def test_profile_layer_precedence(tmp_path):
+    """Test that later layers override earlier ones and missing layers are skipped."""
+    base = tmp_path / ".env"
+    base.write_text("A=base\nB=base\nC=base\n", encoding="utf-8")
+    (tmp_path / ".env.local").write_text("B=local\n", encoding="utf-8")
+    (tmp_path / ".env.dev").write_text("B=dev\nC=dev\nD=dev\n", encoding="utf-8")
+    
+    env_vars = read_env_file(str(base), profile="dev")
+    assert env_vars == {"A": "base", "B": "dev", "C": "dev", "D": "dev"}
+    
+    (tmp_path / ".env.dev.local").write_text("C=mine\n", encoding="utf-8")
+    assert read_env_file(str(base), profile="dev")["C"] == "mine"
+    
+    # Without a profile only the base file is read
+    assert read_env_file(str(base)) == {"A": "base", "B": "base", "C": "base"}
+
+
+def test_profile_reparses_only_changed_layers(tmp_path, monkeypatch):
+    """Test that the merged stack is cached by the layers' stat signatures."""
+    base = tmp_path / ".env"
+    base.write_text("A=1\n", encoding="utf-8")
+    overlay = tmp_path / ".env.prod"
+    overlay.write_text("B=2\n", encoding="utf-8")
+    read_env_file(str(base), profile="prod")
+    
+    parsed = []
+    original = env_reader._parse_env_path
+    monkeypatch.setattr(env_reader, "_parse_env_path", lambda path: parsed.append(path) or original(path))
+    
+    assert read_env_file(str(base), profile="prod") == {"A": "1", "B": "2"}
+    assert parsed == []
+    
+    overlay.write_text("B=22\n", encoding="utf-8")
+    assert read_env_file(str(base), profile="prod") == {"A": "1", "B": "22"}
+    assert parsed == [str(overlay)]
+
+
+def test_invalid_profile_names():
+    """Test that profile names cannot escape the .env directory."""
+    assert env_layer_paths("app/.env") == ["app/.env"]
+    for profile in ("", "../secrets", "a/b"):
+        with pytest.raises(ValueError):
+            env_layer_paths(".env", profile)
+
+
+def test_layered_convert_keeps_values_and_counts_tokens(tmp_path):
+    """Test that profile output round-trips plaintext and counts like streaming."""
+    from ghost_env.jwt_wrapper import generate_signing_key, wrap_value
+    from ghost_env.rules import WrapRules
+    
+    key = generate_signing_key()
+    base = tmp_path / ".env"
+    base.write_text(
+        f'GREETING=" hi "\nEMPTY=\nNOTE="a # b"\nAPI_KEY=secret\nPRE={wrap_value("x", key)}\n',
+        encoding="utf-8",
+    )
+    (tmp_path / ".env.dev").write_text("", encoding="utf-8")
+    rules = WrapRules(wrap_keys=["API_KEY"])
+    
+    streamed = env_reader.write_ghost_env_file(str(base), str(tmp_path / "a.env"), key, rules)
+    layered = env_reader.write_ghost_env_file(
+        str(base), str(tmp_path / "b.env"), key, rules, profile="dev"
+    )
+    
+    assert layered == streamed == 2
+    env_vars = read_env_file(str(tmp_path / "b.env"))
+    assert env_vars["GREETING"] == " hi "
+    assert env_vars["EMPTY"] == ""
+    assert env_vars["NOTE"] == "a # b"
+
@@ -0,0 +1,124 @@
+"""Tests for multi-target export."""
+
+import io
+import json
+
+import pytest
+
+from ghost_env.exporters import export_wrapped, parse_target
+
+
+WRAPPED = {"API_KEY": "gho_env.token-a", "PORT": "8080"}
+
+
+def test_parse_target():
+    """Test parsing FORMAT:PATH specs."""
+    assert parse_target("json:out.json") == ("json", "out.json")
+    assert parse_target("env:-") == ("env", "-")
+    assert parse_target("docker:C:\\env\\app.env") == ("docker", "C:\\env\\app.env")
+    
+    with pytest.raises(ValueError):
+        parse_target("json")
+    with pytest.raises(ValueError):
+        parse_target("yaml:out.yaml")
+
+
+def test_json_matches_json_dumps():
+    """Test that streamed JSON matches json.dumps(indent=2)."""
+    out = io.StringIO()
+    export_wrapped(WRAPPED, [("json", "-")], stdout=out)
+    
+    assert out.getvalue() == json.dumps(WRAPPED, indent=2) + "\n"
+    
+    empty = io.StringIO()
+    export_wrapped({}, [("json", "-")], stdout=empty)
+    assert json.loads(empty.getvalue()) == {}
+
+
+def test_all_targets_share_one_pass(tmp_path):
+    """Test writing every format from the same wrapped values."""
+    targets = [
+        ("env", str(tmp_path / "ghost.env")),
+        ("json", str(tmp_path / "env.json")),
+        ("docker", str(tmp_path / "docker.env")),
+        ("k8s", str(tmp_path / "secret.yaml")),
+    ]
+    
+    export_wrapped(WRAPPED, targets, secret_name="app-secrets")
+    
+    assert (tmp_path / "ghost.env").read_text() == "API_KEY=gho_env.token-a\nPORT=8080\n"
+    assert json.loads((tmp_path / "env.json").read_text()) == WRAPPED
+    assert (tmp_path / "docker.env").read_text() == "API_KEY=gho_env.token-a\nPORT=8080\n"
+    assert (tmp_path / "secret.yaml").read_text() == (
+        "apiVersion: v1\n"
+        "kind: Secret\n"
+        "metadata:\n"
+        '  name: "app-secrets"\n'
+        "type: Opaque\n"
+        "stringData:\n"
+        '  "API_KEY": "gho_env.token-a"\n'
+        '  "PORT": "8080"\n'
+    )
+
+
+def test_docker_rejects_multiline():
+    """Test that multi-line values cannot go into Docker env files."""
+    with pytest.raises(ValueError):
+        export_wrapped({"CERT": "a\nb"}, [("docker", "-")], stdout=io.StringIO())
+
+
+def test_failed_export_leaves_targets_untouched(tmp_path):
+    """Test that a value one format rejects aborts before any target is written."""
+    existing = tmp_path / "ghost.env"
+    existing.write_text("OLD=1\n")
+    targets = [
+        ("env", str(existing)),
+        ("json", str(tmp_path / "env.json")),
+        ("docker", str(tmp_path / "docker.env")),
+    ]
+    
+    with pytest.raises(ValueError):
+        export_wrapped({"API_KEY": "gho_env.token-a", "CERT": "a\nb"}, targets)
+    
+    assert existing.read_text() == "OLD=1\n"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["ghost.env"]
+
+
+def test_export_replaces_targets_atomically(tmp_path):
+    """Test that an I/O failure on one target leaves the others as they were."""
+    existing = tmp_path / "ghost.env"
+    existing.write_text("OLD=1\n")
+    existing.chmod(0o640)
+    targets = [
+        ("env", str(existing)),
+        ("json", str(tmp_path / "missing" / "env.json")),
+    ]
+    
+    with pytest.raises(OSError):
+        export_wrapped(WRAPPED, targets)
+    assert existing.read_text() == "OLD=1\n"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["ghost.env"]
+    
+    export_wrapped(WRAPPED, targets[:1])
+    assert existing.read_text() == "API_KEY=gho_env.token-a\nPORT=8080\n"
+    assert existing.stat().st_mode & 0o777 == 0o640
+
+
+def test_env_target_round_trips_plain_values(tmp_path):
+    """Test that plaintext values survive the env format but stay raw for Docker."""
+    from ghost_env.env_reader import read_env_file
+    
+    values = {
+        "API_KEY": "gho_env.token-a",
+        "GREETING": " hi there ",
+        "QUOTED": '"double"',
+        "SINGLE": "it's",
+        "NOTE": "a # b",
+        "EMPTY": "",
+    }
+    targets = [("env", str(tmp_path / "out.env")), ("docker", str(tmp_path / "docker.env"))]
+    
+    export_wrapped(values, targets)
+    
+    assert read_env_file(str(tmp_path / "out.env")) == values
+    assert (tmp_path / "docker.env").read_text().splitlines()[1] == "GREETING= hi there "
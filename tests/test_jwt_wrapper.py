@@ -2,6 +2,9 @@
 
 import pytest
 from ghost_env.jwt_wrapper import (
+    COMPRESS_THRESHOLD,
+    COMPRESSED_ENCODING,
+    MAX_DECOMPRESSED_SIZE,
     generate_signing_key,
     wrap_value,
     unwrap_value,
@@ -80,3 +83,84 @@ def test_expired_token():
     unwrapped = unwrap_value(wrapped, key)
     assert unwrapped is None
 
+
+
+def test_get_token_expiry():
+    """Test reading the exp claim of a token."""
+    import time
+    from ghost_env.jwt_wrapper import get_token_expiry
+    
+    key = generate_signing_key()
+    wrapped = wrap_value("secret", key, expires_in_days=2)
+    
+    exp = get_token_expiry(wrapped)
+    assert exp is not None
+    assert abs(exp - (time.time() + 2 * 86400)) < 60
+    assert get_token_expiry("gho_env.not-a-valid-token") is None
+
+
+def _pem_bundle() -> str:
+    body = "\n".join("MIIB" + "A" * 56 + f"{i:04d}" for i in range(40))
+    return f"-----BEGIN CERTIFICATE-----\n{body}\n-----END CERTIFICATE-----\n" * 3
+
+
+def test_large_values_are_compressed():
+    """Test that large compressible values shrink and round-trip."""
+    key = generate_signing_key()
+    value = _pem_bundle()
+    
+    compressed = wrap_value(value, key, compress_threshold=COMPRESS_THRESHOLD)
+    plain = wrap_value(value, key)
+    
+    assert len(compressed) < len(plain) / 2
+    assert unwrap_value(compressed, key) == value
+    assert unwrap_value(plain, key) == value
+
+
+def test_uncompressible_values_stay_plain():
+    """Test that values are stored as they are when compression would not help."""
+    import jwt
+    
+    key = generate_signing_key()
+    token = wrap_value("short", key, compress_threshold=1)
+    payload = jwt.decode(token[8:], key, algorithms=["HS256"])
+    assert payload["value"] == "short"
+
+
+def test_decompression_is_bounded():
+    """Test that a signed payload inflating past the limit is rejected."""
+    import base64
+    import zlib
+    import jwt
+    
+    key = generate_signing_key()
+    bomb = base64.b85encode(zlib.compress(b"\0" * (MAX_DECOMPRESSED_SIZE + 1))).decode()
+    token = "gho_env." + jwt.encode(
+        {"enc": COMPRESSED_ENCODING, "z": bomb}, key, algorithm="HS256"
+    )
+    
+    assert unwrap_value(token, key) is None
+
+
+def test_compression_is_opt_in_and_tagged():
+    """Test that tokens are only compressed on request and carry an enc claim."""
+    import jwt
+    
+    key = generate_signing_key()
+    value = _pem_bundle()
+    
+    plain = jwt.decode(wrap_value(value, key)[8:], key, algorithms=["HS256"])
+    assert plain["value"] == value and "enc" not in plain
+    
+    token = wrap_value(value, key, compress_threshold=COMPRESS_THRESHOLD)
+    payload = jwt.decode(token[8:], key, algorithms=["HS256"])
+    assert payload["enc"] == COMPRESSED_ENCODING and "value" not in payload
+
+
+def test_unknown_encoding_is_rejected():
+    """Test that a token with an unknown enc claim does not unwrap."""
+    import jwt
+    
+    key = generate_signing_key()
+    token = "gho_env." + jwt.encode({"enc": "brotli", "z": "abc"}, key, algorithm="HS256")
+    assert unwrap_value(token, key) is None
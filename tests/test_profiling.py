@@ -0,0 +1,76 @@
+"""Tests for instrumentation hooks."""
+
+from contextlib import contextmanager
+
+from ghost_env.env_reader import wrap_env_file
+from ghost_env.jwt_wrapper import generate_signing_key, unwrap_value, wrap_value
+from ghost_env.profiling import (
+    TimingCollector,
+    add_span_hook,
+    add_tracer,
+    remove_span_hook,
+    span,
+    traced,
+)
+
+
+def test_no_hooks_is_passthrough():
+    """Test that instrumented functions behave normally without hooks."""
+    calls = []
+    
+    @traced("test.func")
+    def func(x):
+        calls.append(x)
+        return x * 2
+    
+    assert func(3) == 6
+    assert calls == [3]
+    assert func.__name__ == "func"
+
+
+def test_timing_collector():
+    """Test that the collector aggregates instrumented calls."""
+    key = generate_signing_key()
+    collector = TimingCollector()
+    add_span_hook(collector)
+    try:
+        wrapped = wrap_env_file({"A": "1", "B": "2"}, key)
+        unwrap_value(wrapped["A"], key)
+    finally:
+        remove_span_hook(collector)
+    
+    assert collector.totals["ghost_env.wrap_value"][0] == 2
+    assert collector.totals["ghost_env.unwrap_value"][0] == 1
+    assert collector.totals["ghost_env.wrap_env_file"][0] == 1
+    report = collector.format_report(1.0)
+    assert "ghost_env.wrap_value" in report
+    assert "wall time" in report
+    
+    # Removed hooks see nothing further
+    wrap_value("x", key)
+    assert collector.totals["ghost_env.wrap_value"][0] == 2
+
+
+def test_tracer_adapter():
+    """Test OpenTelemetry-style tracer integration and attributes."""
+    started = []
+    
+    class FakeTracer:
+        @contextmanager
+        def start_as_current_span(self, name, attributes=None):
+            started.append((name, attributes))
+            yield
+    
+    hook = add_tracer(FakeTracer())
+    try:
+        with span("custom", stage="boot"):
+            pass
+        from ghost_env.env_reader import read_env_file
+        read_env_file("/nonexistent/.env")
+    finally:
+        remove_span_hook(hook)
+    
+    assert started == [
+        ("custom", {"stage": "boot"}),
+        ("ghost_env.read_env_file", {"path": "/nonexistent/.env"}),
+    ]
@@ -0,0 +1,432 @@
+"""Tests for the bridge HTTP server."""
+
+import json
+import threading
+import time
+import urllib.request
+
+import pytest
+
+from ghost_env.jwt_wrapper import generate_signing_key, get_token_expiry, unwrap_value
+from ghost_env.rules import WrapRules
+from ghost_env.server import EnvServerState, SnapshotRefresher, SnapshotWarmer, create_server
+
+
+@pytest.fixture
+def running_server():
+    """Start a server on a free port and yield (state, base_url)."""
+    servers = []
+    
+    def start(state):
+        httpd = create_server(state, 0)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        servers.append(httpd)
+        return f"http://127.0.0.1:{httpd.server_address[1]}"
+    
+    yield start
+    
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_snapshot_tracks_expiry():
+    """Test that issued tokens are tracked by their exp claim."""
+    key = generate_signing_key()
+    state = EnvServerState({"API_KEY": "secret", "PORT": "8080"}, key, rules=WrapRules(heuristics=True))
+    
+    snapshot = state.snapshot
+    assert unwrap_value(snapshot.wrapped["API_KEY"], key) == "secret"
+    assert snapshot.wrapped["PORT"] == "8080"
+    assert set(snapshot.expiries) == {"API_KEY"}
+    assert snapshot.earliest_expiry == get_token_expiry(snapshot.wrapped["API_KEY"])
+    assert state.seconds_until_refresh() > 363 * 86400
+
+
+def test_refresh_keeps_fresh_tokens():
+    """Test that a refresh does not rebuild tokens outside the margin."""
+    key = generate_signing_key()
+    state = EnvServerState({"A": "1", "B": "2"}, key)
+    
+    before = state.snapshot
+    after = state.refresh()
+    
+    # Nothing was rebuilt, so there is no new version to publish
+    assert after is before
+    assert after.version == 1
+
+
+def test_refresh_rewraps_tokens_near_expiry():
+    """Test that tokens inside the refresh margin are re-wrapped."""
+    key = generate_signing_key()
+    state = EnvServerState({"A": "1", "B": "2"}, key)
+    
+    # Pretend A is about to expire
+    state.snapshot.expiries["A"] = time.time() + 10
+    old_b = state.snapshot.wrapped["B"]
+    
+    snapshot = state.refresh()
+    
+    assert snapshot.wrapped["B"] == old_b
+    assert unwrap_value(snapshot.wrapped["A"], key) == "1"
+    assert snapshot.expiries["A"] > time.time() + 363 * 86400
+
+
+def test_refresher_swaps_snapshot():
+    """Test that the background refresher swaps in a new snapshot."""
+    key = generate_signing_key()
+    state = EnvServerState({"A": "1"}, key, expires_in_days=1, refresh_margin=2 * 86400)
+    first = state.snapshot
+    
+    refresher = SnapshotRefresher(state, min_interval=0.01)
+    refresher.start()
+    try:
+        deadline = time.time() + 5
+        while state.snapshot is first and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        refresher.stop()
+    
+    assert state.snapshot is not first
+
+
+def test_server_endpoints(running_server):
+    """Test /env.json, /health and /unwrap."""
+    key = generate_signing_key()
+    state = EnvServerState({"API_KEY": "secret"}, key)
+    base = running_server(state)
+    
+    with urllib.request.urlopen(f"{base}/env.json") as response:
+        wrapped = json.loads(response.read())
+    assert wrapped == state.snapshot.wrapped
+    
+    with urllib.request.urlopen(f"{base}/health") as response:
+        assert response.read() == b"OK"
+    
+    request = urllib.request.Request(
+        f"{base}/unwrap",
+        data=json.dumps({"token": wrapped["API_KEY"]}).encode("utf-8"),
+        method="POST",
+    )
+    with urllib.request.urlopen(request) as response:
+        assert json.loads(response.read()) == {"value": "secret"}
+
+
+def test_threaded_server_keep_alive():
+    """Test that the threaded server reuses connections."""
+    import http.client
+    
+    key = generate_signing_key()
+    state = EnvServerState({"API_KEY": "secret"}, key)
+    httpd = create_server(state, 0, threaded=True)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+        for _ in range(3):
+            conn.request("GET", "/health")
+            response = conn.getresponse()
+            assert response.version == 11
+            assert response.read() == b"OK"
+        sock = conn.sock
+        conn.request("GET", "/env.json")
+        assert json.loads(conn.getresponse().read()) == state.snapshot.wrapped
+        assert conn.sock is sock
+        conn.close()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_versions_and_delta():
+    """Test versioned snapshots and ?since deltas."""
+    key = generate_signing_key()
+    state = EnvServerState({"A": "1", "B": "2", "C": "3"}, key)
+    v1 = state.snapshot
+    
+    snapshot = state.reload({"A": "1", "B": "changed", "D": "4"})
+    
+    assert snapshot.version == 2
+    # Unchanged values keep their tokens
+    assert snapshot.wrapped["A"] == v1.wrapped["A"]
+    
+    delta = state.delta(1)
+    assert delta["version"] == 2
+    assert delta["reset"] is False
+    assert set(delta["added"]) == {"D"}
+    assert set(delta["changed"]) == {"B"}
+    assert unwrap_value(delta["changed"]["B"], key) == "changed"
+    assert delta["removed"] == ["C"]
+    
+    assert state.delta(2) == {
+        "version": 2, "since": 2, "reset": False, "added": {}, "changed": {}, "removed": []
+    }
+    assert state.delta(99)["reset"] is True
+    
+    # Reloading identical content publishes nothing
+    assert state.reload({"A": "1", "B": "changed", "D": "4"}) is snapshot
+
+
+def test_env_file_watcher(tmp_path):
+    """Test that .env edits are picked up as a new version."""
+    from ghost_env.server import EnvFileWatcher
+    
+    env_path = tmp_path / ".env"
+    env_path.write_text("A=1\n", encoding="utf-8")
+    state = EnvServerState({"A": "1"}, generate_signing_key())
+    watcher = EnvFileWatcher(state, str(env_path))
+    
+    assert watcher.check() is False
+    env_path.write_text("A=1\nB=2\n", encoding="utf-8")
+    # The first check only notices the change; it reloads once it has settled
+    assert watcher.check() is False
+    assert watcher.check() is True
+    assert state.snapshot.version == 2
+    assert set(state.snapshot.wrapped) == {"A", "B"}
+
+
+def test_env_file_watcher_ignores_truncated_file(tmp_path):
+    """Test that a file caught empty mid-write does not publish a version."""
+    from ghost_env.server import EnvFileWatcher
+    
+    env_path = tmp_path / ".env"
+    env_path.write_text("A=1\nB=2\n", encoding="utf-8")
+    state = EnvServerState({"A": "1", "B": "2"}, generate_signing_key())
+    watcher = EnvFileWatcher(state, str(env_path))
+    old = dict(state.snapshot.wrapped)
+    
+    env_path.write_text("", encoding="utf-8")
+    assert watcher.check() is False
+    assert state.snapshot.version == 1
+    
+    # Once the write completes nothing changed, so no version is published
+    env_path.write_text("A=1\nB=2\n", encoding="utf-8")
+    assert watcher.check() is False
+    assert watcher.check() is True
+    assert state.snapshot.version == 1
+    assert state.snapshot.wrapped == old
+
+
+def test_env_file_watcher_ignores_missing_file(tmp_path):
+    """Test that a briefly missing .env does not publish an empty version."""
+    from ghost_env.server import EnvFileWatcher
+    
+    env_path = tmp_path / ".env"
+    env_path.write_text("A=1\n", encoding="utf-8")
+    state = EnvServerState({"A": "1"}, generate_signing_key())
+    watcher = EnvFileWatcher(state, str(env_path))
+    
+    env_path.unlink()
+    assert watcher.check() is False
+    assert state.snapshot.version == 1
+    
+    env_path.write_text("A=1\nB=2\n", encoding="utf-8")
+    assert watcher.check() is False
+    assert watcher.check() is True
+    assert set(state.snapshot.wrapped) == {"A", "B"}
+
+
+def test_background_threads_survive_errors(tmp_path, caplog):
+    """Test that read and refresh errors are logged instead of killing the threads."""
+    from ghost_env.server import EnvFileWatcher
+    
+    env_path = tmp_path / ".env"
+    env_path.write_text("A=1\n", encoding="utf-8")
+    state = EnvServerState({"A": "1"}, generate_signing_key())
+    watcher = EnvFileWatcher(state, str(env_path), interval=0.01)
+    watcher.start()
+    
+    env_path.write_bytes(b"A=\xff\xfe\n")
+    time.sleep(0.2)
+    assert watcher.is_alive()
+    assert "Reloading" in caplog.text
+    
+    env_path.write_text("A=2\n", encoding="utf-8")
+    deadline = time.time() + 5
+    while state.snapshot.version == 1 and time.time() < deadline:
+        time.sleep(0.01)
+    watcher.stop()
+    assert unwrap_value(state.snapshot.wrapped["A"], state.signing_key) == "2"
+    
+    def broken_refresh():
+        raise RuntimeError("boom")
+    
+    state.refresh = broken_refresh
+    refresher = SnapshotRefresher(state, min_interval=0.01)
+    state.snapshot.expiries["A"] = time.time()
+    state.snapshot.earliest_expiry = time.time()
+    refresher.start()
+    time.sleep(0.1)
+    assert refresher.is_alive()
+    assert "Refreshing wrapped tokens failed" in caplog.text
+    refresher.stop()
+
+
+def test_env_file_watcher_profile_layers(tmp_path):
+    """Test that a new overlay is picked up and only its keys are re-wrapped."""
+    from ghost_env.env_reader import read_env_file
+    from ghost_env.server import EnvFileWatcher
+    
+    env_path = tmp_path / ".env"
+    env_path.write_text("A=1\nB=2\n", encoding="utf-8")
+    state = EnvServerState(read_env_file(str(env_path), "dev"), generate_signing_key())
+    watcher = EnvFileWatcher(state, str(env_path), profile="dev")
+    old_a = state.snapshot.wrapped["A"]
+    
+    (tmp_path / ".env.dev.local").write_text("B=override\n", encoding="utf-8")
+    assert watcher.check() is False
+    assert watcher.check() is True
+    assert state.snapshot.wrapped["A"] == old_a
+    assert unwrap_value(state.snapshot.wrapped["B"], state.signing_key) == "override"
+
+
+def test_http_delta_and_etag(running_server):
+    """Test ?since= and conditional requests over HTTP."""
+    import urllib.error
+    
+    state = EnvServerState({"A": "1"}, generate_signing_key())
+    base = running_server(state)
+    
+    with urllib.request.urlopen(f"{base}/env.json") as response:
+        assert response.headers["X-Env-Version"] == "1"
+        etag = response.headers["ETag"]
+    
+    request = urllib.request.Request(f"{base}/env.json", headers={"If-None-Match": etag})
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        urllib.request.urlopen(request)
+    assert excinfo.value.code == 304
+    assert excinfo.value.headers["Access-Control-Allow-Origin"] == "*"
+    
+    state.reload({"A": "1", "B": "2"})
+    with urllib.request.urlopen(f"{base}/env.json?since=1") as response:
+        assert response.headers["Access-Control-Allow-Origin"] == "*"
+        delta = json.loads(response.read())
+    assert delta["version"] == 2
+    assert set(delta["added"]) == {"B"}
+
+
+def test_event_stream():
+    """Test that /events pushes a reset and then each change."""
+    import http.client
+    
+    state = EnvServerState({"A": "1"}, generate_signing_key())
+    httpd = create_server(state, 0, threaded=True)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    
+    def read_event(response):
+        fields = {}
+        while True:
+            line = response.fp.readline().decode("utf-8").rstrip("\n")
+            if not line:
+                if fields:
+                    return fields
+                continue
+            if line.startswith(":"):
+                continue
+            name, _, value = line.partition(": ")
+            fields[name] = value
+    
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+        conn.request("GET", "/events")
+        response = conn.getresponse()
+        assert response.getheader("Content-Type") == "text/event-stream"
+        
+        first = read_event(response)
+        assert first["id"] == "1"
+        assert json.loads(first["data"])["reset"] is True
+        
+        state.reload({"A": "2"})
+        second = read_event(response)
+        delta = json.loads(second["data"])
+        assert second["id"] == "2"
+        assert delta["reset"] is False
+        assert set(delta["changed"]) == {"A"}
+        conn.close()
+    finally:
+        state.close()
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_event_stream_requires_threaded(running_server):
+    """Test that the single-threaded server refuses event streams."""
+    import urllib.error
+    
+    state = EnvServerState({"A": "1"}, generate_signing_key())
+    base = running_server(state)
+    
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        urllib.request.urlopen(f"{base}/events")
+    assert excinfo.value.code == 501
+
+
+def test_lazy_state_wraps_on_demand():
+    """Test that a lazy state signs only requested keys until warmed."""
+    key = generate_signing_key()
+    state = EnvServerState({"A": "1", "B": "2", "C": "3"}, key, lazy=True)
+    assert not state.warmed
+    
+    first = state.wrap_keys(["B", "MISSING"])
+    assert list(first) == ["B"]
+    assert unwrap_value(first["B"], key) == "2"
+    assert state.wrap_keys(["B"]) == first
+    assert not state.warmed
+    
+    # The full snapshot reuses the memoized token and keeps .env order
+    snapshot = state.snapshot
+    assert state.warmed
+    assert list(snapshot.wrapped) == ["A", "B", "C"]
+    assert snapshot.wrapped["B"] == first["B"]
+    assert snapshot.version == 1
+
+
+def test_lazy_reload_drops_stale_memo():
+    """Test that reloading a lazy state never serves a token for an old value."""
+    key = generate_signing_key()
+    state = EnvServerState({"A": "1"}, key, lazy=True)
+    state.wrap_keys(["A"])
+    
+    snapshot = state.reload({"A": "2"})
+    assert unwrap_value(snapshot.wrapped["A"], key) == "2"
+
+
+def test_snapshot_warmer():
+    """Test that the warmer publishes the first snapshot."""
+    key = generate_signing_key()
+    state = EnvServerState({f"K{i}": str(i) for i in range(10)}, key, lazy=True)
+    
+    warmer = SnapshotWarmer(state, chunk_size=3)
+    warmer.start()
+    warmer.join(10)
+    
+    assert state.warmed
+    assert len(state.snapshot.wrapped) == 10
+
+
+def test_http_key_endpoints(running_server):
+    """Test /env/<KEY> and ?keys= projections on a lazy server."""
+    key = generate_signing_key()
+    state = EnvServerState({"A": "1", "B": "2", "C": "3"}, key, lazy=True)
+    base = running_server(state)
+    
+    with urllib.request.urlopen(f"{base}/env/B") as response:
+        single = json.loads(response.read())
+    assert unwrap_value(single["B"], key) == "2"
+    
+    with urllib.request.urlopen(f"{base}/env.json?keys=C,B&keys=NOPE") as response:
+        projected = json.loads(response.read())
+    assert list(projected) == ["C", "B"]
+    assert projected["B"] == single["B"]
+    assert not state.warmed
+    
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        urllib.request.urlopen(f"{base}/env/NOPE")
+    assert excinfo.value.code == 404
+    
+    with urllib.request.urlopen(f"{base}/env.json") as response:
+        assert json.loads(response.read())["B"] == single["B"]
+    assert state.warmed
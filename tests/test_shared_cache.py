@@ -0,0 +1,127 @@
+"""Tests for the cross-process cache of unwrapped values."""
+
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from ghost_env import shared_cache
+from ghost_env.jwt_wrapper import generate_signing_key, wrap_value
+from ghost_env.shared_cache import SharedEnv, clear_shared_cache, get_shared_cache_dir, unwrap_env_file
+
+
+@pytest.fixture
+def ghost_env_file(tmp_path):
+    """Write a ghost.env file and return (path, signing_key)."""
+    key = generate_signing_key()
+    path = tmp_path / "ghost.env"
+    path.write_text(
+        f"API_KEY={wrap_value('secret', key)}\nPORT=8080\nBAD=gho_env.not-a-valid-token\n",
+        encoding="utf-8",
+    )
+    return path, key
+
+
+def test_first_call_publishes_and_later_calls_attach(tmp_path, monkeypatch, ghost_env_file):
+    """Test that a published entry is reused without verifying again."""
+    path, key = ghost_env_file
+    cache_dir = tmp_path / "shm"
+    cache_dir.mkdir(mode=0o700)
+    
+    first = unwrap_env_file(str(path), key, cache_dir)
+    assert isinstance(first, SharedEnv)
+    assert dict(first) == {"API_KEY": "secret", "PORT": "8080", "BAD": "gho_env.not-a-valid-token"}
+    
+    (entry,) = cache_dir.glob("*.bin")
+    assert entry.stat().st_mode & 0o777 == 0o600
+    
+    def fail(*args):
+        raise AssertionError("tokens were verified again")
+    
+    monkeypatch.setattr(shared_cache, "unwrap_env_vars", fail)
+    assert unwrap_env_file(str(path), key, cache_dir)["API_KEY"] == "secret"
+
+
+def test_edits_and_key_changes_invalidate(tmp_path, ghost_env_file):
+    """Test that a new file version or signing key never reuses old results."""
+    path, key = ghost_env_file
+    cache_dir = tmp_path / "shm"
+    cache_dir.mkdir(mode=0o700)
+    unwrap_env_file(str(path), key, cache_dir)
+    
+    path.write_text(f"API_KEY={wrap_value('rotated', key)}\n", encoding="utf-8")
+    assert dict(unwrap_env_file(str(path), key, cache_dir)) == {"API_KEY": "rotated"}
+    # The previous version was pruned
+    assert len(list(cache_dir.glob("*.bin"))) == 1
+    
+    other = unwrap_env_file(str(path), generate_signing_key(), cache_dir)
+    assert other["API_KEY"].startswith("gho_env.")
+
+
+def test_expired_entries_are_rebuilt(tmp_path, ghost_env_file):
+    """Test that an entry is not used past its earliest token expiry."""
+    path, key = ghost_env_file
+    cache_dir = tmp_path / "shm"
+    cache_dir.mkdir(mode=0o700)
+    
+    first = unwrap_env_file(str(path), key, cache_dir)
+    assert first.expires_at > time.time() + 363 * 86400
+    
+    (entry,) = cache_dir.glob("*.bin")
+    entry.write_bytes(shared_cache._pack({"API_KEY": "stale"}, time.time() - 1))
+    assert unwrap_env_file(str(path), key, cache_dir)["API_KEY"] == "secret"
+
+
+def test_other_processes_attach(tmp_path, ghost_env_file):
+    """Test that a separate process reads the published values."""
+    path, key = ghost_env_file
+    cache_dir = tmp_path / "shm"
+    cache_dir.mkdir(mode=0o700)
+    unwrap_env_file(str(path), key, cache_dir)
+    
+    script = (
+        "import sys\n"
+        "from ghost_env import shared_cache\n"
+        "shared_cache.unwrap_env_vars = None\n"
+        "print(shared_cache.unwrap_env_file(sys.argv[1], sys.argv[2], sys.argv[3])['API_KEY'])\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-c", script, str(path), key, str(cache_dir)],
+        capture_output=True,
+        text=True,
+        env=dict(os.environ, PYTHONPATH=root),
+    )
+    assert result.stdout.strip() == "secret", result.stderr
+
+
+def test_missing_file_is_empty(tmp_path):
+    """Test that a missing ghost.env yields no variables, like read_env_file."""
+    assert unwrap_env_file(str(tmp_path / "missing.env"), generate_signing_key(), tmp_path) == {}
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX ownership checks")
+def test_cache_dir_must_be_private(tmp_path, monkeypatch):
+    """Test that a group/world-accessible cache directory is refused."""
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    monkeypatch.setattr(shared_cache.os, "access", lambda *args: False)
+    
+    directory = get_shared_cache_dir()
+    assert directory.stat().st_mode & 0o777 == 0o700
+    
+    os.chmod(directory, 0o755)
+    with pytest.raises(PermissionError):
+        get_shared_cache_dir()
+
+
+def test_clear_shared_cache(tmp_path, ghost_env_file):
+    """Test that clearing removes published entries."""
+    path, key = ghost_env_file
+    cache_dir = tmp_path / "shm"
+    cache_dir.mkdir(mode=0o700)
+    unwrap_env_file(str(path), key, cache_dir)
+    
+    clear_shared_cache(cache_dir)
+    assert list(cache_dir.iterdir()) == []
@@ -0,0 +1,163 @@
+"""Tests for the persistent token cache."""
+
+import json
+import time
+
+import pytest
+
+from ghost_env.config import ensure_signing_key, generate_signing_key, get_token_cache_path, rotate_signing_key
+from ghost_env.env_reader import write_ghost_env_file
+from ghost_env.jwt_wrapper import unwrap_value
+from ghost_env.token_cache import TokenCache
+
+
+def test_cache_reuses_tokens_across_loads(tmp_path):
+    """Test that a saved token is returned again after reloading."""
+    key = generate_signing_key()
+    path = tmp_path / "cache.json"
+    
+    with TokenCache.open(key, path) as cache:
+        token = cache.wrap("secret")
+        assert cache.misses == 1
+    
+    cache = TokenCache.open(key, path)
+    assert cache.wrap("secret") == token
+    assert cache.hits == 1 and cache.misses == 0
+    assert unwrap_value(token, key) == "secret"
+
+
+def test_cache_file_is_as_sensitive_as_the_key(tmp_path):
+    """Test that the cache is private, since its tokens carry the values."""
+    import jwt
+    
+    key = generate_signing_key()
+    path = tmp_path / "cache.json"
+    
+    with TokenCache.open(key, path) as cache:
+        cache.wrap("hunter2-plaintext")
+    
+    assert path.stat().st_mode & 0o777 == 0o600
+    # Token payloads are readable without the key: the file holds the secret
+    (token, _, _), = json.loads(path.read_text(encoding="utf-8"))["entries"].values()
+    payload = jwt.decode(token[8:], options={"verify_signature": False})
+    assert payload["value"] == "hunter2-plaintext"
+
+
+def test_cache_drops_idle_entries(tmp_path):
+    """Test that entries not reused within max_idle are dropped on save."""
+    key = generate_signing_key()
+    path = tmp_path / "cache.json"
+    cache = TokenCache(key, path, max_idle=3600)
+    cache.wrap("gone")
+    cache.wrap("kept")
+    
+    cache._entries[cache._digest("gone", 365)][2] = time.time() - 7200
+    cache.save()
+    
+    reloaded = TokenCache.open(key, path)
+    assert reloaded.get("gone") is None
+    assert reloaded.get("kept") is not None
+
+
+@pytest.mark.parametrize("content", [
+    "[]",
+    "null",
+    '{"format": 1, "key_id": "x", "entries": []}',
+])
+def test_cache_ignores_malformed_files(tmp_path, content):
+    """Test that malformed cache files are treated as empty."""
+    path = tmp_path / "cache.json"
+    path.write_text(content, encoding="utf-8")
+    
+    cache = TokenCache.open(generate_signing_key(), path)
+    assert len(cache) == 0
+    assert cache.wrap("secret").startswith("gho_env.")
+
+
+def test_cache_skips_malformed_entries(tmp_path):
+    """Test that entries of the wrong shape are dropped on load."""
+    key = generate_signing_key()
+    path = tmp_path / "cache.json"
+    with TokenCache.open(key, path) as cache:
+        token = cache.wrap("secret")
+    
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["entries"]["bad1"] = "token"
+    data["entries"]["bad2"] = [token, "soon", 0]
+    data["entries"]["bad3"] = [1, 2, 3]
+    path.write_text(json.dumps(data), encoding="utf-8")
+    
+    cache = TokenCache.open(key, path)
+    assert len(cache) == 1
+    assert cache.get("secret") == token
+
+
+def test_cache_ignores_other_keys(tmp_path):
+    """Test that a cache written under another key is discarded."""
+    path = tmp_path / "cache.json"
+    with TokenCache.open(generate_signing_key(), path) as cache:
+        cache.wrap("secret")
+    
+    assert len(TokenCache.open(generate_signing_key(), path)) == 0
+
+
+def test_cache_lifetime_is_part_of_the_address(tmp_path):
+    """Test that tokens are only reused for the same lifetime."""
+    cache = TokenCache(generate_signing_key(), tmp_path / "cache.json")
+    token = cache.wrap("secret", 30)
+    
+    assert cache.get("secret", 30) == token
+    assert cache.get("secret", 365) is None
+
+
+def test_cache_skips_tokens_past_reuse_fraction(tmp_path):
+    """Test that tokens with too little lifetime left are not reused."""
+    cache = TokenCache(generate_signing_key(), tmp_path / "cache.json", reuse_fraction=0.5)
+    cache.wrap("secret", 10)
+    
+    entry = next(iter(cache._entries.values()))
+    entry[1] = time.time() + 4 * 86400
+    assert cache.get("secret", 10) is None
+
+
+def test_cache_evicts_expired_and_least_recent(tmp_path):
+    """Test eviction on save."""
+    key = generate_signing_key()
+    path = tmp_path / "cache.json"
+    cache = TokenCache(key, path, max_entries=1)
+    for value in ("a", "b", "c"):
+        cache.wrap(value)
+    
+    entries = list(cache._entries.values())
+    entries[0][2] = 0  # least recently used
+    entries[1][1] = time.time() - 1  # expired
+    cache.save()
+    
+    assert len(TokenCache.open(key, path)) == 1
+    assert TokenCache.open(key, path).get("c") is not None
+
+
+def test_convert_reuses_cached_tokens(tmp_path):
+    """Test that converting an unchanged file twice yields identical output."""
+    key = generate_signing_key()
+    env_path = tmp_path / ".env"
+    env_path.write_text("API_KEY=secret\nDB_URL=postgres://u:p@h/db\n", encoding="utf-8")
+    
+    with TokenCache.open(key, tmp_path / "cache.json") as cache:
+        write_ghost_env_file(str(env_path), str(tmp_path / "first.env"), key, cache=cache)
+    with TokenCache.open(key, tmp_path / "cache.json") as cache:
+        write_ghost_env_file(str(env_path), str(tmp_path / "second.env"), key, cache=cache)
+        assert cache.hits == 2 and cache.misses == 0
+    
+    assert (tmp_path / "first.env").read_text() == (tmp_path / "second.env").read_text()
+
+
+def test_rotate_purges_cache(monkeypatch, tmp_path):
+    """Test that rotating the signing key deletes the cache file."""
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    with TokenCache.open(ensure_signing_key()) as cache:
+        cache.wrap("secret")
+    assert get_token_cache_path().exists()
+    
+    rotate_signing_key()
+    assert not get_token_cache_path().exists()